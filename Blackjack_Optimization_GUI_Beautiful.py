@@ -1,14 +1,26 @@
-import cvxpy as cp
 import numpy as np
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import threading
+import queue
+import time
 from matplotlib.figure import Figure
 from tkinter.font import Font
 import os
 from PIL import Image, ImageTk
+from blackjack_convex_optimisation import OPTIMIZER_VERSION, optimize_bets, optimize_bet_ramp
+from blackjack_artifacts import DEFAULT_CACHE_DIR, ev_by_count_summary, load_ev_by_count, load_or_compute
+from blackjack_common import SimulationAccumulator, load_simulator
+
+SOLVERS = ["Continuous (LP)", "Chip ramp (DP)"]
+
+# Live simulation: the worker posts at most one snapshot per MESSAGE_INTERVAL
+# seconds and the plot redraws at most LIVE_FPS times per second
+MESSAGE_INTERVAL = 0.05
+LIVE_FPS = 10
+MAX_HISTORY_POINTS = 2000
 
 class ModernButton(tk.Button):
     """Custom button with modern styling"""
@@ -121,18 +133,26 @@ class BlackjackOptimizationGUI:
         self.results_tab = ttk.Frame(self.tab_control, style='Tab.TFrame')
         self.tab_control.add(self.results_tab, text="Results")
         
+        # Live simulation tab
+        self.live_tab = ttk.Frame(self.tab_control, style='Tab.TFrame')
+        self.tab_control.add(self.live_tab, text="Live Simulation")
+        
         # Setup parameter inputs
         self.setup_parameter_inputs()
         
         # Setup results display
         self.setup_results_display()
         
+        # Setup live convergence view
+        self.setup_live_display()
+        
         # Add footer
         self.create_footer()
         
         # Initialize results storage
         self.optimal_bets = None
         self.expected_profit = None
+        self.solver = SOLVERS[0]
         
     def configure_styles(self):
         """Configure custom ttk styles"""
@@ -274,6 +294,34 @@ class BlackjackOptimizationGUI:
         ev_states_entry.grid(row=2, column=1, padx=5, pady=12)
         ModernTooltip(ev_states_entry, "Number of states considered as high/low count")
         
+        # Bet ramp parameters below the EV parameters
+        ramp_frame = CustomFrame(right_column, text="Bet Ramp")
+        ramp_frame.pack(padx=5, pady=10, fill="both", expand=True)
+        
+        ttk.Label(ramp_frame, text="Solver:").grid(row=0, column=0, padx=8, pady=8, sticky="w")
+        self.solver_var = tk.StringVar(value=SOLVERS[0])
+        solver_box = ttk.Combobox(ramp_frame, textvariable=self.solver_var, values=SOLVERS,
+                                  state="readonly", width=16)
+        solver_box.grid(row=0, column=1, columnspan=3, padx=5, pady=8, sticky="w")
+        ModernTooltip(solver_box, "Continuous bet sizes, or a monotone ramp of chip multiples")
+        
+        ttk.Label(ramp_frame, text="Chip size / max levels:").grid(row=1, column=0, padx=8, pady=8, sticky="w")
+        self.chip_var = tk.StringVar(value="5.0")
+        chip_entry = ttk.Entry(ramp_frame, textvariable=self.chip_var, width=6)
+        chip_entry.grid(row=1, column=1, padx=5, pady=8)
+        ModernTooltip(chip_entry, "Bets are multiples of this chip value (chip ramp only)")
+        
+        self.levels_var = tk.StringVar(value="4")
+        levels_entry = ttk.Entry(ramp_frame, textvariable=self.levels_var, width=6)
+        levels_entry.grid(row=1, column=3, padx=5, pady=8)
+        ModernTooltip(levels_entry, "Maximum number of distinct bet levels (chip ramp only)")
+        
+        ttk.Label(ramp_frame, text="Ramp bankroll (optional):").grid(row=2, column=0, padx=8, pady=8, sticky="w")
+        self.bankroll_var = tk.StringVar(value="")
+        bankroll_entry = ttk.Entry(ramp_frame, textvariable=self.bankroll_var, width=10)
+        bankroll_entry.grid(row=2, column=1, columnspan=3, padx=5, pady=8, sticky="w")
+        ModernTooltip(bankroll_entry, "Kelly risk penalty for the chip ramp; the continuous solver ignores it")
+        
         # Buttons with modern styling
         button_frame = ttk.Frame(main_param_frame)
         button_frame.pack(pady=20, fill="x")
@@ -325,6 +373,196 @@ class BlackjackOptimizationGUI:
                                  bg=self.colors['accent'], font=("Segoe UI", 10))
         export_btn.pack(side=tk.RIGHT, padx=5)
     
+    def setup_live_display(self):
+        main_live_container = ttk.Frame(self.live_tab)
+        main_live_container.pack(padx=20, pady=15, fill="both", expand=True)
+        
+        # Simulation controls
+        controls_frame = CustomFrame(main_live_container, text="Simulation")
+        controls_frame.pack(padx=5, pady=5, fill="x")
+        
+        ttk.Label(controls_frame, text="Hands:").grid(row=0, column=0, padx=8, pady=8, sticky="w")
+        self.live_hands_var = tk.StringVar(value="1000000")
+        hands_entry = ttk.Entry(controls_frame, textvariable=self.live_hands_var, width=12)
+        hands_entry.grid(row=0, column=1, padx=5, pady=8)
+        ModernTooltip(hands_entry, "Total number of hands to simulate")
+        
+        ttk.Label(controls_frame, text="Decks:").grid(row=0, column=2, padx=8, pady=8, sticky="w")
+        self.live_decks_var = tk.StringVar(value="6")
+        decks_entry = ttk.Entry(controls_frame, textvariable=self.live_decks_var, width=6)
+        decks_entry.grid(row=0, column=3, padx=5, pady=8)
+        ModernTooltip(decks_entry, "Number of decks in the shoe")
+        
+        start_btn = ModernButton(controls_frame, text="Start", command=self.start_live_simulation,
+                                 bg=self.colors['primary'])
+        start_btn.grid(row=0, column=4, padx=10, pady=8)
+        stop_btn = ModernButton(controls_frame, text="Stop", command=self.stop_live_simulation,
+                                bg=self.colors['secondary'])
+        stop_btn.grid(row=0, column=5, padx=5, pady=8)
+        load_btn = ModernButton(controls_frame, text="Load Result", command=self.load_live_result,
+                                bg=self.colors['accent'])
+        load_btn.grid(row=0, column=6, padx=5, pady=8)
+        ModernTooltip(load_btn, "Show a saved EV-by-count result (.bjart)")
+        
+        self.live_status = ttk.Label(controls_frame, text="Idle", font=("Segoe UI", 10, "italic"))
+        self.live_status.grid(row=0, column=7, padx=10, pady=8, sticky="w")
+        
+        # Convergence plots
+        graph_frame = CustomFrame(main_live_container, text="Convergence")
+        graph_frame.pack(padx=5, pady=10, fill="both", expand=True)
+        
+        self.live_figure = Figure(figsize=(8, 5), dpi=100)
+        self.live_figure.patch.set_facecolor('#fafafa')
+        self.edge_plot = self.live_figure.add_subplot(211)
+        self.count_plot = self.live_figure.add_subplot(212)
+        
+        self.live_canvas = FigureCanvasTkAgg(self.live_figure, graph_frame)
+        self.live_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        
+        self.live_queue = queue.Queue()
+        self.live_stop = threading.Event()
+        self.live_thread = None
+        self.live_history = []
+        self.live_latest = None
+        self.live_poll_id = None  # Pending after() call of the poll loop
+    
+    def start_live_simulation(self):
+        if self.live_thread and self.live_thread.is_alive():
+            return
+        try:
+            num_hands = int(self.live_hands_var.get())
+            num_decks = int(self.live_decks_var.get())
+        except ValueError as e:
+            messagebox.showerror("Input Error", f"Please check your inputs: {str(e)}")
+            return
+        
+        self.live_stop.clear()
+        self.live_history = []
+        self.live_latest = None
+        self.live_queue = queue.Queue()
+        self.live_thread = threading.Thread(target=self.run_live_simulation_thread,
+                                            args=(num_hands, num_decks, self.live_queue), daemon=True)
+        self.live_thread.start()
+        self.live_status.config(text="Running...")
+        # A stopped run's poll loop may still be pending; only one loop may read the queue
+        if self.live_poll_id is not None:
+            self.root.after_cancel(self.live_poll_id)
+        self.live_poll_id = self.root.after(int(1000 / LIVE_FPS), self.poll_live_updates)
+    
+    def stop_live_simulation(self):
+        self.live_stop.set()
+    
+    def load_live_result(self):
+        if self.live_thread and self.live_thread.is_alive():
+            return
+        path = filedialog.askopenfilename(title="Load EV-by-count result", initialdir=DEFAULT_CACHE_DIR,
+                                          filetypes=[("Blackjack artifacts", "*.bjart"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            # The histogram is memory-mapped; only its columns are read, not the whole file
+            summary = ev_by_count_summary(load_ev_by_count(path))
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Load Error", f"Could not load {os.path.basename(path)}: {str(e)}")
+            return
+        
+        self.live_history = [(summary["hands"], summary["house_edge"], summary["std_error"])]
+        self.live_latest = summary
+        self.plot_live_results()
+        self.live_status.config(text=f"Loaded {os.path.basename(path)} ({summary['hands']:,} hands)")
+    
+    def run_live_simulation_thread(self, num_hands, num_decks, updates):
+        """Simulate in the background, posting one snapshot per message interval"""
+        try:
+            simulator = load_simulator()
+            deck = simulator.Deck(num_decks)
+            accumulator = SimulationAccumulator()
+            last_message = time.monotonic()
+            
+            for hand in range(1, num_hands + 1):
+                if deck.needs_shuffle():
+                    deck.reset()
+                true_count = deck.true_count()
+                accumulator.add(simulator.play_hand(deck), true_count)
+                
+                stopped = self.live_stop.is_set() and hand < num_hands
+                if hand == num_hands or stopped or time.monotonic() - last_message >= MESSAGE_INTERVAL:
+                    updates.put({"hands": accumulator.n,
+                                 "house_edge": accumulator.house_edge,
+                                 "std_error": accumulator.std_error,
+                                 "ev_by_count": accumulator.ev_by_count(),
+                                 "done": hand == num_hands or stopped,
+                                 "stopped": stopped})
+                    last_message = time.monotonic()
+                    if stopped:
+                        break
+        except Exception as e:
+            updates.put({"error": str(e)})
+    
+    def poll_live_updates(self):
+        """Drain every queued snapshot, then redraw once (bounded by LIVE_FPS)"""
+        self.live_poll_id = None
+        done = False
+        stopped = False
+        updated = False
+        while True:
+            try:
+                message = self.live_queue.get_nowait()
+            except queue.Empty:
+                break
+            if "error" in message:
+                self.live_status.config(text=f"Error: {message['error']}")
+                return
+            self.live_history.append((message["hands"], message["house_edge"], message["std_error"]))
+            self.live_latest = message
+            done = done or message["done"]
+            stopped = stopped or message["stopped"]
+            updated = True
+        
+        # Thin the history so long runs keep a bounded number of points
+        if len(self.live_history) > MAX_HISTORY_POINTS:
+            self.live_history = self.live_history[::2]
+        
+        if updated:
+            self.plot_live_results()
+        
+        if done or (not updated and not self.live_thread.is_alive()):
+            self.live_status.config(text="Finished" if done and not stopped else "Stopped")
+        else:
+            self.live_poll_id = self.root.after(int(1000 / LIVE_FPS), self.poll_live_updates)
+    
+    def plot_live_results(self):
+        latest = self.live_latest
+        hands, edges, errors = (np.array(column) for column in zip(*self.live_history))
+        
+        # House edge with a 95% confidence band
+        self.edge_plot.clear()
+        self.edge_plot.fill_between(hands, edges - 1.96 * errors, edges + 1.96 * errors,
+                                    color='#3366FF', alpha=0.2, label='95% CI')
+        self.edge_plot.plot(hands, edges, color='#3366FF', linewidth=1.2, label='House edge')
+        self.edge_plot.axhline(0, color='gray', linewidth=0.8, linestyle='--')
+        self.edge_plot.set_xlabel('Hands', fontsize=10)
+        self.edge_plot.set_ylabel('House edge', fontsize=10)
+        self.edge_plot.set_title(f"House edge {latest['house_edge']:.4%} ± {1.96 * latest['std_error']:.4%}",
+                                 fontsize=11, fontweight='bold')
+        self.edge_plot.legend(loc='upper right', fontsize=8)
+        
+        # Per-count EV with 95% error bars (counts with enough hands)
+        self.count_plot.clear()
+        counts = [(count, ev, error) for count, (n, ev, error) in latest["ev_by_count"].items() if n >= 100]
+        if counts:
+            count_values, evs, count_errors = zip(*counts)
+            colors = [self.colors['success'] if ev > 0 else self.colors['accent'] for ev in evs]
+            self.count_plot.bar(count_values, evs, yerr=1.96 * np.array(count_errors),
+                                color=colors, alpha=0.8, capsize=3)
+        self.count_plot.axhline(0, color='gray', linewidth=0.8)
+        self.count_plot.set_xlabel('True count', fontsize=10)
+        self.count_plot.set_ylabel('EV per hand', fontsize=10)
+        
+        self.live_status.config(text=f"{latest['hands']:,} hands")
+        self.live_figure.tight_layout()
+        self.live_canvas.draw_idle()
+    
     def reset_parameters(self):
         self.n_var.set("1000")
         self.min_bet_var.set("1.0")
@@ -334,6 +572,10 @@ class BlackjackOptimizationGUI:
         self.low_ev_min_var.set("-0.01")
         self.low_ev_max_var.set("-0.005")
         self.ev_states_var.set("10")
+        self.solver_var.set(SOLVERS[0])
+        self.chip_var.set("5.0")
+        self.levels_var.set("4")
+        self.bankroll_var.set("")
         self.status_text.config(text="Parameters reset to default values")
     
     def run_optimization(self):
@@ -347,6 +589,14 @@ class BlackjackOptimizationGUI:
             low_ev_min = float(self.low_ev_min_var.get())
             low_ev_max = float(self.low_ev_max_var.get())
             ev_states = int(self.ev_states_var.get())
+            solver = self.solver_var.get()
+            chip = float(self.chip_var.get())
+            max_levels = int(self.levels_var.get())
+            bankroll = None
+            if solver == SOLVERS[1] and self.bankroll_var.get().strip():
+                bankroll = float(self.bankroll_var.get())
+                if bankroll <= 0:
+                    raise ValueError("Ramp bankroll must be positive")
             
             # Update status
             self.status_text.config(text="Optimization in progress...")
@@ -354,7 +604,8 @@ class BlackjackOptimizationGUI:
             # Create thread to run optimization
             threading.Thread(target=self.run_optimization_thread, 
                              args=(N, x_min, x_max, high_ev_min, high_ev_max, 
-                                   low_ev_min, low_ev_max, ev_states)).start()
+                                   low_ev_min, low_ev_max, ev_states,
+                                   solver, chip, max_levels, bankroll)).start()
             
             # Clear and update results text area
             self.result_text.delete(1.0, tk.END)
@@ -365,7 +616,8 @@ class BlackjackOptimizationGUI:
             messagebox.showerror("Input Error", f"Please check your inputs: {str(e)}")
             self.status_text.config(text=f"Error: {str(e)}")
     
-    def run_optimization_thread(self, N, x_min, x_max, high_ev_min, high_ev_max, low_ev_min, low_ev_max, ev_states):
+    def run_optimization_thread(self, N, x_min, x_max, high_ev_min, high_ev_max, low_ev_min, low_ev_max, ev_states,
+                                solver=SOLVERS[0], chip=1.0, max_levels=5, bankroll=None):
         try:
             # Expected value per hand for each count state
             expected_ev = np.zeros(N)
@@ -377,35 +629,34 @@ class BlackjackOptimizationGUI:
             # Probability of each count state (uniform for illustration)
             prob_state = np.ones(N) / N
 
-            # Decision variables: bet size for each count state
-            x = cp.Variable(N)
-
-            # Objective: maximize expected profit across all count states
-            objective = cp.Maximize(cp.sum(cp.multiply(prob_state, expected_ev * x)))
-
-            # Constraints
-            constraints = [
-                x >= x_min,
-                x <= x_max
-                # Optionally: cp.sum(x) <= total_bankroll
-            ]
-
-            # Problem definition
-            problem = cp.Problem(objective, constraints)
-
-            # Solve
-            problem.solve()
+            # Solve for the bet sizes (or reuse the saved result of an identical run)
+            def solve():
+                if solver == SOLVERS[1]:
+                    bets, value = optimize_bet_ramp(expected_ev, prob_state, x_min, x_max,
+                                                    chip=chip, max_levels=max_levels, bankroll=bankroll)
+                else:
+                    bets, value = optimize_bets(expected_ev, prob_state, x_min, x_max)
+                arrays = {"optimal_bets": bets, "expected_ev": expected_ev, "prob_state": prob_state}
+                return arrays, {"objective": float(value)}
+            
+            params = {"N": N, "x_min": x_min, "x_max": x_max, "high_ev": [high_ev_min, high_ev_max],
+                      "low_ev": [low_ev_min, low_ev_max], "ev_states": ev_states, "solver": solver,
+                      "chip": chip, "max_levels": max_levels, "bankroll": bankroll,
+                      "optimizer_version": OPTIMIZER_VERSION}
+            artifact = load_or_compute("optimizer", params, solve)
             
             # Store results
-            self.optimal_bets = x.value
-            self.expected_profit = problem.value
+            self.optimal_bets = np.asarray(artifact["optimal_bets"])
+            self.expected_profit = artifact.metadata["objective"]
+            self.solver = solver
             
             # Update UI with results (must be done in main thread)
             self.root.after(0, self.update_results)
             
         except Exception as e:
-            # Update UI with error (must be done in main thread)
-            self.root.after(0, lambda: self.show_error(str(e)))
+            # Update UI with error (must be done in main thread); `e` is unbound after this block
+            message = str(e)
+            self.root.after(0, lambda: self.show_error(message))
     
     def update_results(self):
         # Clear previous results
@@ -414,9 +665,15 @@ class BlackjackOptimizationGUI:
         # Display optimization results with styled text
         self.result_text.insert(tk.END, "OPTIMIZATION COMPLETE\n", "header")
         self.result_text.insert(tk.END, "═══════════════════════\n\n")
-        self.result_text.insert(tk.END, f"Maximum expected profit per hand: ", "emphasis")
+        objective_label = "Ramp objective per hand" if self.solver == SOLVERS[1] else "Maximum expected profit per hand"
+        self.result_text.insert(tk.END, f"{objective_label}: ", "emphasis")
         self.result_text.insert(tk.END, f"{self.expected_profit:.6f}\n\n", "success")
         
+        if self.solver == SOLVERS[1]:
+            levels = np.unique(self.optimal_bets)
+            self.result_text.insert(tk.END, "Bet ramp levels: ", "emphasis")
+            self.result_text.insert(tk.END, ", ".join(f"{level:.2f}" for level in levels) + "\n\n")
+        
         # Sample of optimal bet sizes
         self.result_text.insert(tk.END, "SAMPLE OF OPTIMAL BET SIZES:\n", "header")
         self.result_text.insert(tk.END, "─────────────────────────────\n")
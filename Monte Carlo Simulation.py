@@ -1,5 +1,10 @@
 import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import numpy as np
+from blackjack_artifacts import load_or_compute, strategy_table_to_arrays, arrays_to_strategy_table
+from blackjack_common import load_simulator
 
 class Card:
     def __init__(self, rank, suit):
@@ -18,12 +23,15 @@ class Card:
         return f"{self.rank}{self.suit}"
 
 class Deck:
-    def __init__(self, num_decks=6):
+    def __init__(self, num_decks=6, penetration=0.75, rng=None):
         self.num_decks = num_decks
+        self.penetration = penetration
+        self.rng = rng or random
         self.reset()
     
     def reset(self):
         self.cards = []
+        self.running_count = 0
         suits = ['♠', '♥', '♦', '♣']
         ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
         
@@ -34,12 +42,33 @@ class Deck:
         self.shuffle()
         
     def shuffle(self):
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
         
+    def needs_shuffle(self):
+        """True once the cut card has come out; the shoe is reshuffled before the next hand"""
+        return len(self.cards) < self.num_decks * 52 * (1 - self.penetration)
+    
     def deal(self):
-        if len(self.cards) < self.num_decks * 52 * 0.25:  # Reshuffle at 25% remaining
+        # A hand that reaches the cut card is finished from the same shoe;
+        # the reshuffle happens between hands (see play_hand and play_round)
+        if not self.cards:
             self.reset()
-        return self.cards.pop()
+        card = self.cards.pop()
+        self.running_count += hi_lo_value(card)
+        return card
+    
+    def true_count(self):
+        """Hi-Lo running count per deck remaining"""
+        return self.running_count / max(len(self.cards) / 52, 0.5)
+
+def hi_lo_value(card):
+    """Hi-Lo count tag: +1 for 2-6, 0 for 7-9, -1 for tens and aces"""
+    value = card.value()
+    if value <= 6:
+        return 1
+    elif value >= 10:
+        return -1
+    return 0
 
 def hand_value(hand):
     """Calculate the best value of a blackjack hand"""
@@ -168,18 +197,24 @@ def basic_strategy(player_hand, dealer_upcard, can_double=True, can_split=True):
     else:  # 8 or less
         return 'H'
 
-def play_hand(deck):
-    """Play a single hand of blackjack using basic strategy"""
-    initial_bet = 1.0
-    total_bet = initial_bet
+def play_hand(deck, strategy=basic_strategy):
+    """Play a single hand of blackjack using basic strategy (or another strategy)"""
+    # Reshuffle at the cut card
+    if deck.needs_shuffle():
+        deck.reset()
     
     # Deal initial cards
-    player_hands = [[deck.deal(), deck.deal()]]
-    player_bets = [initial_bet]
+    player_hand = [deck.deal(), deck.deal()]
     dealer_hand = [deck.deal(), deck.deal()]
     
+    return play_dealt_hand(deck, player_hand, dealer_hand, strategy)
+
+def play_dealt_hand(deck, player_hand, dealer_hand, strategy=basic_strategy):
+    """Play out a hand of blackjack from already dealt initial cards"""
+    initial_bet = 1.0
+    
     # Check for player blackjack
-    if len(player_hands[0]) == 2 and hand_value(player_hands[0]) == 21:
+    if len(player_hand) == 2 and hand_value(player_hand) == 21:
         # Check for dealer blackjack (push)
         if hand_value(dealer_hand) == 21:
             return 0  # Push
@@ -192,62 +227,72 @@ def play_hand(deck):
             return -initial_bet  # Player loses
     
     # Player's turn
+    final_hands, final_bets = play_player_hand(deck, player_hand, dealer_hand[0], initial_bet, strategy)
+    
+    # Dealer's turn - only if player hasn't busted all hands
+    if any(hand_value(hand) <= 21 for hand in final_hands):
+        play_dealer_hand(deck, dealer_hand)
+    
+    return settle_hands(final_hands, final_bets, hand_value(dealer_hand))
+
+def play_player_hand(deck, player_hand, dealer_upcard, bet, strategy=basic_strategy):
+    """
+    Play a player hand (and any hands split from it) to completion
+    Returns: (final hands, final bets)
+    """
     final_hands = []
     final_bets = []
+    hands_to_process = [(player_hand, bet)]
     
-    for i in range(len(player_hands)):
-        hands_to_process = [(player_hands[i], player_bets[i])]
+    while hands_to_process:
+        current_hand, current_bet = hands_to_process.pop(0)
+        can_double = len(current_hand) == 2
+        can_split = len(current_hand) == 2 and current_hand[0].value() == current_hand[1].value()
         
-        while hands_to_process:
-            current_hand, current_bet = hands_to_process.pop(0)
-            can_double = len(current_hand) == 2
-            can_split = len(current_hand) == 2 and current_hand[0].value() == current_hand[1].value()
+        while True:
+            decision = strategy(current_hand, dealer_upcard, can_double, can_split)
             
-            while True:
-                decision = basic_strategy(current_hand, dealer_hand[0], can_double, can_split)
-                
-                if decision == 'S':  # Stand
-                    final_hands.append(current_hand)
-                    final_bets.append(current_bet)
-                    break
-                
-                elif decision == 'H':  # Hit
-                    current_hand.append(deck.deal())
-                    can_double = False
-                    can_split = False
-                    
-                    if hand_value(current_hand) > 21:
-                        final_hands.append(current_hand)
-                        final_bets.append(current_bet)
-                        break
+            if decision == 'S':  # Stand
+                final_hands.append(current_hand)
+                final_bets.append(current_bet)
+                break
+            
+            elif decision == 'H':  # Hit
+                current_hand.append(deck.deal())
+                can_double = False
+                can_split = False
                 
-                elif decision == 'D':  # Double down
-                    current_hand.append(deck.deal())
-                    current_bet *= 2
-                    total_bet += current_bet - current_bet/2
+                if hand_value(current_hand) > 21:
                     final_hands.append(current_hand)
                     final_bets.append(current_bet)
                     break
+            
+            elif decision == 'D':  # Double down
+                current_hand.append(deck.deal())
+                current_bet *= 2
+                final_hands.append(current_hand)
+                final_bets.append(current_bet)
+                break
+            
+            elif decision == 'P':  # Split
+                # Create two new hands
+                hand1 = [current_hand[0], deck.deal()]
+                hand2 = [current_hand[1], deck.deal()]
                 
-                elif decision == 'P':  # Split
-                    # Create two new hands
-                    hand1 = [current_hand[0], deck.deal()]
-                    hand2 = [current_hand[1], deck.deal()]
-                    
-                    # Add both hands to process queue
-                    hands_to_process.append((hand1, current_bet))
-                    hands_to_process.append((hand2, current_bet))
-                    total_bet += current_bet  # Add bet for second hand
-                    break
-    
-    # Dealer's turn - only if player hasn't busted all hands
-    if any(hand_value(hand) <= 21 for hand in final_hands):
-        while hand_value(dealer_hand) < 17:
-            dealer_hand.append(deck.deal())
+                # Add both hands to process queue
+                hands_to_process.append((hand1, current_bet))
+                hands_to_process.append((hand2, current_bet))
+                break
     
-    dealer_value = hand_value(dealer_hand)
-    
-    # Calculate result
+    return final_hands, final_bets
+
+def play_dealer_hand(deck, dealer_hand):
+    """Dealer draws to 17 or more (stands on soft 17)"""
+    while hand_value(dealer_hand) < 17:
+        dealer_hand.append(deck.deal())
+
+def settle_hands(final_hands, final_bets, dealer_value):
+    """Calculate the total profit of finished player hands against the dealer's total"""
     total_profit = 0
     
     for hand, bet in zip(final_hands, final_bets):
@@ -265,21 +310,686 @@ def play_hand(deck):
     
     return total_profit
 
-def monte_carlo_blackjack(num_hands=1000000, num_decks=6):
+def monte_carlo_blackjack(num_hands=1000000, num_decks=6, penetration=0.75, strategy=basic_strategy, rng=None):
     """Calculate house edge using Monte Carlo simulation"""
-    deck = Deck(num_decks)
+    deck = Deck(num_decks, penetration, rng)
     total_initial_bet = 0
     total_profit = 0
     
     for _ in range(num_hands):
         total_initial_bet += 1  # Initial bet is always 1 unit
-        profit = play_hand(deck)
+        profit = play_hand(deck, strategy)
         total_profit += profit
     
     house_edge = -total_profit / total_initial_bet
     
     return house_edge
 
+# Part of cached simulation result keys: bump it whenever the rules, the dealing
+# or basic_strategy change, so results cached from the old simulator are not reused
+SIMULATOR_VERSION = 1
+
+def load_monte_carlo_house_edge(num_hands=1000000, num_decks=6, penetration=0.75, seed=0, cache_dir=None):
+    """Seeded monte_carlo_blackjack house edge, simulated once and then reused from the artifact cache"""
+    def compute():
+        house_edge = monte_carlo_blackjack(num_hands, num_decks, penetration, rng=random.Random(seed))
+        return {}, {"house_edge": house_edge}
+    
+    params = {"num_hands": num_hands, "num_decks": num_decks, "penetration": penetration, "seed": seed,
+              "simulator_version": SIMULATOR_VERSION}
+    return load_or_compute("house_edge", params, compute, cache_dir).metadata["house_edge"]
+
+class Seat:
+    """
+    A player seat with its own strategy and bet ramp.
+    The bet ramp is a list of (minimum true count, units) steps; below the
+    first step the seat bets one unit.
+    """
+    def __init__(self, strategy=basic_strategy, bet_ramp=None):
+        self.strategy = strategy
+        self.bet_ramp = sorted(bet_ramp or [])
+    
+    def bet(self, true_count):
+        units = 1.0
+        for min_count, step_units in self.bet_ramp:
+            if true_count >= min_count:
+                units = step_units
+        return units
+
+def play_round(deck, seats):
+    """
+    Play one round at a table: every seat against a single dealer hand
+    Returns: list of (initial bet, profit) per seat
+    """
+    # Shuffle before betting so bets are sized from the shoe the round is dealt from
+    if deck.needs_shuffle():
+        deck.reset()
+    true_count = deck.true_count()
+    bets = [seat.bet(true_count) for seat in seats]
+    
+    # Deal in table order: first card to each seat, upcard, second card to each seat, hole card
+    player_hands = [[deck.deal()] for _ in seats]
+    dealer_upcard = deck.deal()
+    for hand in player_hands:
+        hand.append(deck.deal())
+    dealer_hand = [dealer_upcard, deck.deal()]
+    dealer_blackjack = hand_value(dealer_hand) == 21
+    
+    # Each seat plays in turn; blackjacks are settled immediately
+    profits = [0.0] * len(seats)
+    unsettled = []
+    for i, (seat, hand, bet) in enumerate(zip(seats, player_hands, bets)):
+        if hand_value(hand) == 21:
+            profits[i] = 0.0 if dealer_blackjack else bet * 1.5
+        elif dealer_blackjack:
+            profits[i] = -bet
+        else:
+            unsettled.append((i, play_player_hand(deck, hand, dealer_upcard, bet, seat.strategy)))
+    
+    # Dealer's turn - only if some seat has a live hand
+    if any(hand_value(hand) <= 21 for _, (final_hands, _) in unsettled for hand in final_hands):
+        play_dealer_hand(deck, dealer_hand)
+    
+    dealer_value = hand_value(dealer_hand)
+    for i, (final_hands, final_bets) in unsettled:
+        profits[i] = settle_hands(final_hands, final_bets, dealer_value)
+    
+    return list(zip(bets, profits))
+
+def simulate_table(num_rounds, seats, num_decks=6, penetration=0.75, seed=None):
+    """
+    Simulate one table sharing a shoe between its seats
+    Returns: (per-seat initial bets, per-seat profits, number of shoes used)
+    """
+    deck = Deck(num_decks, penetration, rng=random.Random(seed))
+    total_bets = np.zeros(len(seats))
+    total_profits = np.zeros(len(seats))
+    shoes = 1
+    
+    for _ in range(num_rounds):
+        cards_before = len(deck.cards)
+        for i, (bet, profit) in enumerate(play_round(deck, seats)):
+            total_bets[i] += bet
+            total_profits[i] += profit
+        if len(deck.cards) > cards_before:  # Reshuffled during the round
+            shoes += 1
+    
+    return total_bets, total_profits, shoes
+
+def _simulate_table_args(args):
+    return simulate_table(*args)
+
+def monte_carlo_table(num_rounds=100000, seats=None, num_decks=6, penetration=0.75,
+                      num_tables=1, processes=None):
+    """
+    Simulate full tables of 1-7 seats drawing from one shoe per table.
+    Independent tables run in parallel worker processes; results are pooled.
+    Returns: list of per-seat dicts with house edge, average bet and profit per round
+    """
+    if seats is None:
+        seats = [Seat()]
+    if not 1 <= len(seats) <= 7:
+        raise ValueError("A table has between 1 and 7 seats")
+    
+    jobs = [(num_rounds, seats, num_decks, penetration, random.randrange(2**32))
+            for _ in range(num_tables)]
+    if num_tables == 1:
+        results = [_simulate_table_args(jobs[0])]
+    else:
+        # Workers register this module before unpickling tasks (needed under spawn)
+        with multiprocessing.Pool(processes, initializer=load_simulator) as pool:
+            results = pool.map(_simulate_table_args, jobs)
+    
+    total_bets = sum(result[0] for result in results)
+    total_profits = sum(result[1] for result in results)
+    total_shoes = sum(result[2] for result in results)
+    total_rounds = num_rounds * num_tables
+    
+    return [{"house_edge": float(-total_profits[i] / total_bets[i]),
+             "average_bet": float(total_bets[i] / total_rounds),
+             "profit_per_round": float(total_profits[i] / total_rounds),
+             "rounds_per_shoe": total_rounds / total_shoes}
+            for i in range(len(seats))]
+
+class SweepShoe:
+    """A single pass through one shuffled shoe, tracking how many cards were dealt"""
+    def __init__(self, num_decks=6):
+        self.deck = Deck(num_decks)
+        self.dealt = 0
+    
+    def needs_shuffle(self):
+        # penetration_sweep places its own cut cards
+        return False
+    
+    def deal(self):
+        # Only a hand started just before the end of the shoe can run out of cards
+        if not self.deck.cards:
+            self.deck.reset()
+        self.dealt += 1
+        return self.deck.cards.pop()
+
+def penetration_sweep(num_shoes=10000, num_decks=6, penetrations=(0.5, 0.6, 0.75, 0.85)):
+    """
+    Calculate house edge at several penetrations from one pass per shoe.
+    Each shuffled shoe is dealt once up to the deepest cut card; a hand counts
+    towards every penetration whose cut card had not been reached when the hand
+    started, so all settings share the common prefix of hands. The cut card
+    rule is the one of Deck.needs_shuffle, so each penetration sees the same
+    hands as a separate run of monte_carlo_blackjack.
+    Returns: {penetration: {"house_edge": ..., "hands_per_shoe": ...}}
+    """
+    shoe_size = num_decks * 52
+    # A hand starts while at least this many cards remain (see Deck.needs_shuffle)
+    cut_cards = {p: shoe_size * (1 - p) for p in penetrations}
+    deepest_cut = min(cut_cards.values())
+    total_profit = {p: 0.0 for p in penetrations}
+    total_hands = {p: 0 for p in penetrations}
+    
+    for _ in range(num_shoes):
+        shoe = SweepShoe(num_decks)
+        while shoe_size - shoe.dealt >= deepest_cut:
+            remaining = shoe_size - shoe.dealt
+            profit = play_hand(shoe)
+            for p, cut_card in cut_cards.items():
+                if remaining >= cut_card:
+                    total_profit[p] += profit
+                    total_hands[p] += 1
+    
+    return {p: {"house_edge": -total_profit[p] / total_hands[p],
+                "hands_per_shoe": total_hands[p] / num_shoes}
+            for p in penetrations}
+
+class StratumShoe:
+    """Shoe with the initial deal of one stratum removed, dealing uniformly at random"""
+    def __init__(self, cards):
+        self.cards = list(cards)
+        self.remaining = len(self.cards)
+    
+    def reset(self):
+        # Dealt cards sit at the end of the list, so restoring the shoe is free
+        self.remaining = len(self.cards)
+    
+    def deal(self):
+        i = random.randrange(self.remaining)
+        self.remaining -= 1
+        self.cards[i], self.cards[self.remaining] = self.cards[self.remaining], self.cards[i]
+        return self.cards[self.remaining]
+
+def initial_deal_strata(cards):
+    """
+    Enumerate every (player pair, dealer upcard) stratum of the initial deal
+    with its exact probability for the given shoe composition.
+    Cards are grouped by value, so 10/J/Q/K form one stratum.
+    Returns: list of ((first value, second value), upcard value, probability)
+    """
+    counts = {}
+    for card in cards:
+        counts[card.value()] = counts.get(card.value(), 0) + 1
+    
+    total = len(cards)
+    denominator = total * (total - 1) * (total - 2)
+    values = sorted(counts)
+    strata = []
+    
+    for i, first in enumerate(values):
+        for second in values[i:]:
+            for upcard in values:
+                n_first = counts[first]
+                n_second = counts[second] - (second == first)
+                n_upcard = counts[upcard] - (upcard == first) - (upcard == second)
+                if n_second <= 0 or n_upcard <= 0:
+                    continue
+                
+                probability = n_first * n_second * n_upcard / denominator
+                # Unordered pair: both dealing orders lead to the same stratum
+                if first != second:
+                    probability *= 2
+                strata.append(((first, second), upcard, probability))
+    
+    return strata
+
+def stratified_monte_carlo_blackjack(num_hands=1000000, num_decks=6, deck=None, pilot_fraction=0.1,
+                                     min_pilot_hands=30):
+    """
+    Calculate house edge by stratifying on the initial deal.
+    Every hand is played from the full current shoe (a fresh shoe unless `deck`
+    is given), so this measures the edge off the top of that shoe, not the
+    average over shoe depth that `monte_carlo_blackjack` estimates.
+    Every (player pair, upcard) stratum gets exact weight for that shoe. A pilot
+    run estimates the spread of each stratum, then the remaining hands are
+    allocated by Neyman allocation (proportional to probability times standard
+    deviation). The variance reduction is modest (about 1.4x at equal hands),
+    since most of the variance comes from the draws after the initial deal.
+    Every stratum gets at least `min_pilot_hands` pilot hands: with fewer, a
+    stratum whose pilot outcomes happen to be equal looks variance-free, gets
+    no further hands and biases the estimate while shrinking its error bar.
+    Returns: (house edge, standard error of the house edge)
+    """
+    if deck is None:
+        deck = Deck(num_decks)
+    
+    strata = initial_deal_strata(deck.cards)
+    if num_hands < min_pilot_hands * len(strata):
+        raise ValueError(f"Stratified sampling needs at least {min_pilot_hands * len(strata):,} hands "
+                         f"({min_pilot_hands} pilot hands for each of {len(strata)} strata)")
+    
+    # Remove the fixed initial cards of each stratum from its own copy of the shoe
+    layouts = []
+    for (first, second), upcard, probability in strata:
+        remaining = list(deck.cards)
+        fixed = []
+        for value in (first, second, upcard):
+            for j, card in enumerate(remaining):
+                if card.value() == value:
+                    fixed.append(remaining.pop(j))
+                    break
+        layouts.append((fixed, StratumShoe(remaining), probability))
+    
+    # Per-stratum running sums: hands played, sum of profits, sum of squared profits
+    n = np.zeros(len(strata))
+    sums = np.zeros(len(strata))
+    sums_sq = np.zeros(len(strata))
+    
+    def run_stratum(h, hands):
+        (first, second, upcard), shoe, _ = layouts[h]
+        for _ in range(hands):
+            shoe.reset()
+            profit = play_dealt_hand(shoe, [first, second], [upcard, shoe.deal()])
+            sums[h] += profit
+            sums_sq[h] += profit * profit
+        n[h] += hands
+    
+    # Pilot run, large enough per stratum for a usable variance estimate
+    pilot_hands = max(min_pilot_hands, int(num_hands * pilot_fraction / len(strata)))
+    for h in range(len(strata)):
+        run_stratum(h, pilot_hands)
+    
+    probabilities = np.array([layout[2] for layout in layouts])
+    variances = np.maximum(sums_sq / n - (sums / n) ** 2, 0) * n / (n - 1)
+    
+    # Neyman allocation of the remaining budget
+    weights = probabilities * np.sqrt(variances)
+    remaining_hands = num_hands - int(n.sum())
+    if remaining_hands > 0 and weights.sum() > 0:
+        allocation = np.floor(remaining_hands * weights / weights.sum()).astype(int)
+        for h in range(len(strata)):
+            run_stratum(h, allocation[h])
+    
+    # Recombine with exact stratum weights
+    means = sums / n
+    variances = np.maximum(sums_sq / n - means ** 2, 0) * n / (n - 1)
+    expected_profit = np.sum(probabilities * means)
+    std_error = np.sqrt(np.sum(probabilities ** 2 * variances / n))
+    
+    return -expected_profit, std_error
+
+# Rank probabilities of an infinite deck, keyed by card value (11 = ace)
+INFINITE_DECK_PROBS = {2: 1/13, 3: 1/13, 4: 1/13, 5: 1/13, 6: 1/13, 7: 1/13,
+                       8: 1/13, 9: 1/13, 10: 4/13, 11: 1/13}
+
+# Dealer outcomes of the infinite-deck chains: final totals 17-21, then bust
+DEALER_OUTCOMES = [17, 18, 19, 20, 21, 'bust']
+
+def value_card(value):
+    """Card with the given blackjack value (11 = ace)"""
+    return Card('A' if value == 11 else str(value), '')
+
+def representative_hand(hard_total, aces):
+    """Build a card list with the given hard total (aces as 1) and number of aces"""
+    hand = [value_card(11) for _ in range(aces)]
+    rest = hard_total - aces
+    while rest > 0:
+        value = min(10, rest)
+        if rest - value == 1:  # No non-ace card is worth 1
+            value -= 1
+        hand.append(value_card(value))
+        rest -= value
+    return hand
+
+def hand_state(hand):
+    """Markov chain state of a hand: (hard total with aces as 1, number of aces)"""
+    aces = sum(1 for card in hand if card.rank == 'A')
+    return sum(card.value() for card in hand) - 10 * aces, aces
+
+def hit_state(state, value):
+    """State reached by drawing a card of the given value"""
+    hard_total, aces = state
+    if value == 11:
+        return hard_total + 1, aces + 1
+    return hard_total + value, aces
+
+@lru_cache(maxsize=None)
+def _dealer_distribution(upcard_value, rank_probs):
+    values = [value for value, _ in rank_probs]
+    probs = dict(rank_probs)
+    
+    # Transient states: dealer totals below 17 (dealer stands on all 17s)
+    transient = [(hard_total, aces) for hard_total in range(2, 17) for aces in (0, 1)
+                 if hand_value(representative_hand(hard_total, aces)) < 17]
+    index = {state: i for i, state in enumerate(transient)}
+    
+    def absorbing(state):
+        value = hand_value(representative_hand(*state))
+        return 5 if value > 21 else value - 17
+    
+    # Q: transient -> transient, R: transient -> absorbing outcome
+    Q = np.zeros((len(transient), len(transient)))
+    R = np.zeros((len(transient), len(DEALER_OUTCOMES)))
+    for i, state in enumerate(transient):
+        for value in values:
+            # Aces only matter as "has an ace" for the dealer
+            hard_total, aces = hit_state(state, value)
+            next_state = (hard_total, min(aces, 1))
+            if next_state in index:
+                Q[i, index[next_state]] += probs[value]
+            else:
+                R[i, absorbing(next_state)] += probs[value]
+    B = np.linalg.solve(np.eye(len(transient)) - Q, R)
+    
+    # Hole card, conditioned on the dealer not having blackjack (dealer peeks)
+    hole_probs = dict(probs)
+    if upcard_value == 11:
+        hole_probs[10] = 0.0
+    elif upcard_value == 10:
+        hole_probs[11] = 0.0
+    total = sum(hole_probs.values())
+    
+    upcard_state = hit_state((0, 0), upcard_value)
+    distribution = np.zeros(len(DEALER_OUTCOMES))
+    for value, prob in hole_probs.items():
+        hard_total, aces = hit_state(upcard_state, value)
+        state = (hard_total, min(aces, 1))
+        if state in index:
+            distribution += prob / total * B[index[state]]
+        else:
+            distribution[absorbing(state)] += prob / total
+    return distribution
+
+def infinite_deck_dealer_distribution(upcard_value, rank_probs=None):
+    """
+    Dealer final-total distribution for an upcard in an infinite deck,
+    given the dealer has no blackjack.
+    Returns: probabilities ordered as DEALER_OUTCOMES
+    """
+    rank_probs = rank_probs or INFINITE_DECK_PROBS
+    return _dealer_distribution(upcard_value, tuple(sorted(rank_probs.items()))).copy()
+
+@lru_cache(maxsize=None)
+def _infinite_deck_ev(rank_probs, blackjack_payout):
+    values = [value for value, _ in rank_probs]
+    probs = dict(rank_probs)
+    total_ev = 0.0
+    
+    for upcard_value in values:
+        upcard = value_card(upcard_value)
+        dealer = _dealer_distribution(upcard_value, rank_probs)
+        
+        # EV of standing on each total against this dealer distribution
+        stand_ev = {}
+        for total in range(4, 22):
+            win = dealer[5] + sum(dealer[k] for k in range(5) if DEALER_OUTCOMES[k] < total)
+            lose = sum(dealer[k] for k in range(5) if DEALER_OUTCOMES[k] > total)
+            stand_ev[total] = win - lose
+        
+        # Player hit chain over states with three or more cards
+        # (no doubling or splitting, so basic strategy only hits or stands)
+        states = []
+        frontier = [hit_state(hit_state((0, 0), a), b) for a in values for b in values]
+        seen = set()
+        while frontier:
+            state = frontier.pop()
+            if state in seen:
+                continue
+            seen.add(state)
+            hand = representative_hand(*state)
+            if hand_value(hand) <= 21 and basic_strategy(hand, upcard, False, False) == 'H':
+                states.append(state)
+                frontier.extend(hit_state(state, value) for value in values)
+        index = {state: i for i, state in enumerate(states)}
+        
+        def terminal_ev(state):
+            value = hand_value(representative_hand(*state))
+            return -1.0 if value > 21 else stand_ev[value]
+        
+        Q = np.zeros((len(states), len(states)))
+        r = np.zeros(len(states))
+        for i, state in enumerate(states):
+            for value in values:
+                next_state = hit_state(state, value)
+                if next_state in index:
+                    Q[i, index[next_state]] += probs[value]
+                else:
+                    r[i] += probs[value] * terminal_ev(next_state)
+        hit_ev = np.linalg.solve(np.eye(len(states)) - Q, r)
+        
+        def after_hit_ev(state):
+            return hit_ev[index[state]] if state in index else terminal_ev(state)
+        
+        def two_card_ev(first, second, split_ev=None):
+            hand = [value_card(first), value_card(second)]
+            decision = basic_strategy(hand, upcard, True, first == second)
+            state = hand_state(hand)
+            if decision == 'S':
+                return stand_ev[hand_value(hand)]
+            elif decision == 'H':
+                return sum(probs[v] * after_hit_ev(hit_state(state, v)) for v in values)
+            elif decision == 'D':
+                return 2 * sum(probs[v] * terminal_ev(hit_state(state, v)) for v in values)
+            # Split with unlimited resplits: E = 2 * (sum over non-pair draws + q_pair * E)
+            if split_ev is not None:
+                return split_ev
+            rest = sum(probs[v] * two_card_ev(first, v, 0.0) for v in values if v != first)
+            return 2 * rest / (1 - 2 * probs[first])
+        
+        dealer_blackjack = probs[10] if upcard_value == 11 else probs[11] if upcard_value == 10 else 0.0
+        for first in values:
+            for second in values:
+                weight = probs[upcard_value] * probs[first] * probs[second]
+                if {first, second} == {10, 11}:
+                    ev = blackjack_payout * (1 - dealer_blackjack)
+                else:
+                    ev = -dealer_blackjack + (1 - dealer_blackjack) * two_card_ev(first, second)
+                total_ev += weight * ev
+    
+    return total_ev
+
+def infinite_deck_house_edge(rank_probs=None, blackjack_payout=1.5):
+    """
+    Analytic house edge of basic_strategy for an infinite deck.
+    Player and dealer hands are Markov chains on (hard total, aces) states with
+    fixed rank probabilities, solved with linear algebra instead of simulation.
+    Results are cached per rule set, so repeated calls are effectively free.
+    """
+    rank_probs = rank_probs or INFINITE_DECK_PROBS
+    return -_infinite_deck_ev(tuple(sorted(rank_probs.items())), blackjack_payout)
+
+# Card values in shoe-count order (11 = ace)
+CARD_VALUES = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11)
+
+def shoe_counts(num_decks=6):
+    """Number of cards of each value in a fresh shoe, in CARD_VALUES order"""
+    return tuple(16 * num_decks if value == 10 else 4 * num_decks for value in CARD_VALUES)
+
+def remove_card(counts, value):
+    counts = list(counts)
+    counts[value - 2] -= 1
+    return tuple(counts)
+
+def total_value(hard_total, has_ace):
+    """Best total of a hand from its hard total (aces as 1)"""
+    return hard_total + 10 if has_ace and hard_total + 10 <= 21 else hard_total
+
+@lru_cache(maxsize=None)
+def dealer_probabilities(hard_total, has_ace, counts, peek_card=None):
+    """
+    Exact dealer outcome distribution from the remaining shoe composition.
+    `peek_card` is the hole-card value excluded by the dealer's blackjack peek.
+    Returns: probabilities ordered as DEALER_OUTCOMES
+    """
+    value = total_value(hard_total, has_ace)
+    if value > 21:
+        return (0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    if value >= 17:  # Dealer stands on all 17s
+        return tuple(1.0 if outcome == value else 0.0 for outcome in DEALER_OUTCOMES)
+    
+    remaining = sum(counts)
+    if peek_card is not None:
+        remaining -= counts[peek_card - 2]
+    
+    distribution = [0.0] * len(DEALER_OUTCOMES)
+    for value, count in zip(CARD_VALUES, counts):
+        if count == 0 or value == peek_card:
+            continue
+        outcome = dealer_probabilities(hard_total + (1 if value == 11 else value),
+                                       has_ace or value == 11, remove_card(counts, value))
+        for k in range(len(distribution)):
+            distribution[k] += count / remaining * outcome[k]
+    return tuple(distribution)
+
+class CompositionSolver:
+    """Exact EVs of player actions by composition for one upcard, memoized over remaining cards"""
+    def __init__(self, upcard, counts):
+        self.upcard = upcard
+        self.counts = counts  # Shoe with the upcard removed
+        self.peek_card = {11: 10, 10: 11}.get(upcard)
+        self.hit_cache = {}
+    
+    def remaining(self, hand):
+        counts = self.counts
+        for value in hand:
+            counts = remove_card(counts, value)
+        return counts
+    
+    def stand_ev(self, hand):
+        hard_total = sum(1 if value == 11 else value for value in hand)
+        player_value = total_value(hard_total, 11 in hand)
+        if player_value > 21:
+            return -1.0
+        
+        upcard = self.upcard
+        dealer = dealer_probabilities(1 if upcard == 11 else upcard, upcard == 11,
+                                      self.remaining(hand), self.peek_card)
+        win = dealer[5] + sum(p for outcome, p in zip(DEALER_OUTCOMES[:5], dealer) if outcome < player_value)
+        lose = sum(p for outcome, p in zip(DEALER_OUTCOMES[:5], dealer) if outcome > player_value)
+        return win - lose
+    
+    def draws(self, hand):
+        """(probability, hand with the drawn card) for every possible next card"""
+        counts = self.remaining(hand)
+        remaining = sum(counts)
+        return [(count / remaining, tuple(sorted(hand + (value,))))
+                for value, count in zip(CARD_VALUES, counts) if count > 0]
+    
+    def is_bust(self, hand):
+        return sum(1 if value == 11 else value for value in hand) > 21
+    
+    def hit_ev(self, hand):
+        if hand not in self.hit_cache:
+            ev = 0.0
+            for p, next_hand in self.draws(hand):
+                ev += p * (-1.0 if self.is_bust(next_hand) else self.best_ev(next_hand))
+            self.hit_cache[hand] = ev
+        return self.hit_cache[hand]
+    
+    def best_ev(self, hand):
+        """EV of playing on optimally when only hitting or standing is allowed"""
+        stand = self.stand_ev(hand)
+        if total_value(sum(1 if v == 11 else v for v in hand), 11 in hand) == 21:
+            return stand
+        return max(stand, self.hit_ev(hand))
+    
+    def double_ev(self, hand):
+        return 2 * sum(p * self.stand_ev(next_hand) for p, next_hand in self.draws(hand))
+    
+    def split_ev(self, hand):
+        # Each split hand draws one card and may double; resplits are not modelled
+        value = hand[0]
+        counts = self.remaining(hand)
+        remaining = sum(counts)
+        ev = 0.0
+        for drawn, count in zip(CARD_VALUES, counts):
+            if count == 0:
+                continue
+            split_hand = tuple(sorted((value, drawn)))
+            solver = CompositionSolver(self.upcard, remove_card(self.counts, value))
+            ev += count / remaining * max(solver.best_ev(split_hand), solver.double_ev(split_hand))
+        return 2 * ev
+    
+    def action_evs(self, hand):
+        evs = {'S': self.stand_ev(hand), 'H': self.hit_ev(hand)}
+        if len(hand) == 2:
+            evs['D'] = self.double_ev(hand)
+            if hand[0] == hand[1]:
+                evs['P'] = self.split_ev(hand)
+        return evs
+
+def player_compositions(counts, hand=(), start=0):
+    """All sorted hands of two or more cards with a hard total of 21 or less"""
+    for i in range(start, len(CARD_VALUES)):
+        value = CARD_VALUES[i]
+        new_hand = hand + (value,)
+        if sum(1 if v == 11 else v for v in new_hand) > 21 or new_hand.count(value) > counts[i]:
+            continue
+        if len(new_hand) >= 2:
+            yield new_hand
+        yield from player_compositions(counts, new_hand, i)
+
+def strategy_table_for_upcard(upcard, num_decks=6):
+    """Preferred actions (best first) for every player composition against one upcard"""
+    counts = remove_card(shoe_counts(num_decks), upcard)
+    solver = CompositionSolver(upcard, counts)
+    table = {}
+    for hand in player_compositions(counts):
+        evs = solver.action_evs(hand)
+        table[(hand, upcard)] = ''.join(sorted(evs, key=evs.get, reverse=True))
+    dealer_probabilities.cache_clear()
+    return table
+
+def _strategy_table_args(args):
+    return strategy_table_for_upcard(*args)
+
+def generate_strategy_tables(num_decks=6, processes=None):
+    """
+    Composition-dependent optimal strategy for a shoe of `num_decks` decks.
+    Each upcard is solved exactly (by memoized recursion over the remaining
+    cards) in its own worker process.
+    Returns: {(sorted player card values, upcard value): actions, best first}
+    """
+    table = {}
+    # Workers register this module before unpickling tasks (needed under spawn)
+    with ProcessPoolExecutor(max_workers=processes, initializer=load_simulator) as executor:
+        for upcard_table in executor.map(_strategy_table_args, [(upcard, num_decks) for upcard in CARD_VALUES]):
+            table.update(upcard_table)
+    return table
+
+# Part of the strategy table cache key: bump it whenever the solver or the rules
+# it models change, so cached tables from the old solver are not reused
+STRATEGY_SOLVER_VERSION = 1
+
+def load_strategy_tables(num_decks=6, processes=None, cache_dir=None):
+    """Composition-dependent strategy tables, generated once and then reused from the artifact cache"""
+    def compute():
+        return strategy_table_to_arrays(generate_strategy_tables(num_decks, processes)), {}
+    
+    params = {"num_decks": num_decks, "rules": "S17 DAS peek", "solver_version": STRATEGY_SOLVER_VERSION}
+    return arrays_to_strategy_table(load_or_compute("strategy_table", params, compute, cache_dir))
+
+class CompositionStrategy:
+    """Strategy callable (same signature as basic_strategy) backed by a compiled strategy table"""
+    def __init__(self, table):
+        self.table = table
+    
+    def __call__(self, player_hand, dealer_upcard, can_double=True, can_split=True):
+        key = (tuple(sorted(card.value() for card in player_hand)), dealer_upcard.value())
+        actions = self.table.get(key)
+        if actions is None:
+            return basic_strategy(player_hand, dealer_upcard, can_double, can_split)
+        
+        for action in actions:
+            if (action == 'D' and not can_double) or (action == 'P' and not can_split):
+                continue
+            return action
+
 def display_rules_table():
     """Display a table of the blackjack rules used in the simulation"""
     rules = [
@@ -327,51 +1037,66 @@ def display_rules_table():
     print("- Split 6s vs dealer 2-6")
     print("- Split 3s and 2s vs dealer 2-7")
 
-def compare_with_chart():
-    """Compare the code's basic strategy with the strategy chart from the image"""
-    print("\nCOMPARING STRATEGY WITH CHART")
-    print("-" * 60)
-    print("Discrepancies between code and chart:")
+def compare_with_chart(table=None, num_decks=6):
+    """
+    Verify basic_strategy against the composition-dependent optimal strategy
+    for every two-card hand and upcard.
+    Returns: list of (player card values, upcard value, chart action, optimal action)
+    """
+    if table is None:
+        table = load_strategy_tables(num_decks)
     
-    # Hard totals
-    print("\n1. HARD TOTALS:")
-    print("   - Hard 12: Code stands vs 4-6, chart stands vs 4-6 ✓")
-    print("   - Hard 9: Code doubles vs 3-6, chart doubles vs 3-6 ✓")
-    print("   - Hard 8-3: No significant discrepancies ✓")
+    discrepancies = []
+    for (hand, upcard), actions in sorted(table.items()):
+        if len(hand) != 2:
+            continue
+        cards = [value_card(value) for value in hand]
+        chart_action = basic_strategy(cards, value_card(upcard), True, hand[0] == hand[1])
+        if chart_action != actions[0]:
+            discrepancies.append((hand, upcard, chart_action, actions[0]))
     
-    # Soft hands
-    print("\n2. SOFT HANDS:")
-    print("   - A-7 (Soft 18): Code doubles vs 3-6, chart doubles vs 3-6 ✓")
-    print("   - A-6 (Soft 17): Code doubles vs 3-6, chart doubles vs 3-6 ✓")
-    print("   - A-5 (Soft 16): Code doubles vs 4-6, chart doubles vs 4-6 ✓")
-    print("   - A-4 (Soft 15): Code doubles vs 4-6, chart doubles vs 4-6 ✓")
-    print("   - A-3 (Soft 14): Code doubles vs 5-6, chart doubles vs 5-6 ✓")
-    print("   - A-2 (Soft 13): Code doubles vs 5-6, chart doubles vs 5-6 ✓")
-    
-    # Pairs
-    print("\n3. PAIRS:")
-    print("   - A-A: Always split in both code and chart ✓")
-    print("   - 10-10: Never split in both code and chart ✓")
-    print("   - 9-9: Code splits vs 2-6, 8-9; chart splits vs 2-6, 8-9 ✓")
-    print("   - 8-8: Always split in both code and chart ✓")
-    print("   - 7-7: Code splits vs 2-7, chart splits vs 2-7 ✓")
-    print("   - 6-6: Code splits vs 2-6, chart splits vs 2-6 ✓")
-    print("   - 5-5: Code never splits, chart never splits (doubles instead) ✓")
-    print("   - 4-4: Code never splits (always hit), chart never splits (always hit) ✓")
-    print("   - 3-3: Code splits vs 2-7, chart splits vs 2-7 ✓")
-    print("   - 2-2: Code splits vs 2-7, chart splits vs 2-7 ✓")
-    
-    print("\nSummary: Our code now matches the strategy chart completely.")
+    print("\nCOMPARING STRATEGY WITH COMPOSITION-DEPENDENT OPTIMUM")
+    print("-" * 60)
+    for hand, upcard, chart_action, optimal_action in discrepancies:
+        cards = '-'.join('A' if value == 11 else str(value) for value in hand)
+        upcard_name = 'A' if upcard == 11 else str(upcard)
+        print(f"   - {cards} vs {upcard_name}: chart {chart_action}, optimal {optimal_action}")
+    print(f"\nSummary: {len(discrepancies)} two-card hands differ from the optimal strategy.")
+    
+    return discrepancies
 
 if __name__ == "__main__":
     #np.random.seed(42)  # For reproducibility
     num_hands = 1000000
     
     print(f"Running Monte Carlo simulation with {num_hands:,} hands...")
-    house_edge = monte_carlo_blackjack(num_hands)
+    # Seeded, so a repeated run is read back from the artifact cache
+    house_edge = load_monte_carlo_house_edge(num_hands, seed=42)
     print(f"Estimated house edge: {house_edge:.4%}")
+    
+    # Off-the-top edge of a fresh shoe, stratified on the initial deal for a tighter error bar
+    #house_edge, std_error = stratified_monte_carlo_blackjack(num_hands)
+    #print(f"Stratified house edge: {house_edge:.4%} ± {std_error:.4%}")
+    
+    # House edge at several penetrations from a single pass per shoe
+    #for penetration, result in penetration_sweep(num_shoes=2000).items():
+    #    print(f"Penetration {penetration:.0%}: {result['house_edge']:.4%} "
+    #          f"({result['hands_per_shoe']:.1f} hands per shoe)")
+    
+    # Full table: seven seats sharing one shoe, the last one spreading with the count
+    #seats = [Seat() for _ in range(6)] + [Seat(bet_ramp=[(1, 2), (2, 4), (3, 8)])]
+    #for i, result in enumerate(monte_carlo_table(50000, seats, num_tables=8)):
+    #    print(f"Seat {i + 1}: house edge {result['house_edge']:.4%}, "
+    #          f"average bet {result['average_bet']:.2f}")
+    
+    # Analytic infinite-deck edge as a quick sanity check
+    #print(f"Infinite-deck house edge: {infinite_deck_house_edge():.4%}")
     # Display the rules table
     #display_rules_table()
     
     # Compare with the strategy chart
-    #compare_with_chart()
\ No newline at end of file
+    #compare_with_chart()
+    
+    # Play the composition-dependent strategy generated for this shoe
+    #strategy = CompositionStrategy(load_strategy_tables(num_decks=6))
+    #print(f"Composition-dependent house edge: {monte_carlo_blackjack(num_hands, strategy=strategy):.4%}")
\ No newline at end of file
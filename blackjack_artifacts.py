@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from blackjack_common import SimulationAccumulator
+
+# File layout: magic, format version, header length, JSON header, then each
+# array's raw bytes (C order) starting on an ALIGNMENT boundary so it can be
+# memory-mapped directly.
+MAGIC = b"BJARTIF\0"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<8sIQ")
+ALIGNMENT = 64
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "BLACKJACK_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts"))
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def save_artifact(path, kind, arrays, metadata=None):
+    """
+    Write named NumPy arrays plus JSON metadata to a versioned artifact file.
+    The file is written next to its destination and renamed into place, so
+    readers never see a partial artifact. Object arrays are rejected: their
+    contents are pointers that mean nothing to another process.
+    """
+    arrays = {name: np.asarray(array, order="C") for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f"Array '{name}' has object dtype and cannot be saved as an artifact")
+
+    # Offsets depend on the header length, which depends on the offsets
+    header_size = 0
+    while True:
+        offset = _aligned(PREAMBLE.size + header_size)
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps({"kind": kind, "metadata": metadata or {}, "arrays": layout}).encode()
+        if len(header) <= header_size:
+            break
+        header_size = len(header) + 64
+    header = header.ljust(header_size)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, header_size))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(layout[name]["offset"])
+            f.write(array.tobytes())
+    os.replace(temp_path, path)
+
+class Artifact:
+    """
+    A loaded artifact. Arrays are opened lazily on first access, as read-only
+    memory maps by default, so multi-GB results cost nothing until used.
+    """
+    def __init__(self, path, kind, metadata, layout, mmap=True):
+        self.path = path
+        self.kind = kind
+        self.metadata = metadata
+        self.layout = layout
+        self.mmap = mmap
+        self._arrays = {}
+
+    def __contains__(self, name):
+        return name in self.layout
+
+    def __getitem__(self, name):
+        if name not in self._arrays:
+            entry = self.layout[name]
+            dtype = np.dtype(entry["dtype"])
+            shape = tuple(entry["shape"])
+            if self.mmap and np.prod(shape) > 0:
+                array = np.memmap(self.path, dtype=dtype, mode="r", offset=entry["offset"], shape=shape)
+            else:
+                with open(self.path, "rb") as f:
+                    f.seek(entry["offset"])
+                    count = int(np.prod(shape))
+                    array = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+            self._arrays[name] = array
+        return self._arrays[name]
+
+    def keys(self):
+        return self.layout.keys()
+
+def load_artifact(path, mmap=True):
+    """Read an artifact's header; arrays load lazily when accessed"""
+    with open(path, "rb") as f:
+        preamble = f.read(PREAMBLE.size)
+        if len(preamble) < PREAMBLE.size:
+            raise ValueError(f"{path} is not a blackjack artifact")
+        magic, version, header_size = PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a blackjack artifact")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} uses artifact format {version}; this version reads up to {FORMAT_VERSION}")
+        header = json.loads(f.read(header_size))
+    _check_layout(path, header["arrays"], os.path.getsize(path))
+    return Artifact(path, header["kind"], header["metadata"], header["arrays"], mmap)
+
+def _check_layout(path, layout, file_size):
+    """Reject array entries that would map object pointers or read past the end of the file"""
+    for name, entry in layout.items():
+        try:
+            dtype = np.dtype(entry["dtype"])
+        except TypeError:
+            raise ValueError(f"{path}: array '{name}' has invalid dtype {entry['dtype']!r}") from None
+        if dtype.hasobject:
+            raise ValueError(f"{path}: array '{name}' has object dtype")
+        nbytes = int(np.prod(entry["shape"], dtype=np.int64)) * dtype.itemsize
+        if entry["offset"] < PREAMBLE.size or entry["offset"] + nbytes > file_size:
+            raise ValueError(f"{path}: array '{name}' lies outside the file")
+
+def artifact_path(kind, params, cache_dir=None):
+    """Cache location for an artifact of the given kind computed from `params`"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, f"{kind}-{digest}.bjart")
+
+def load_or_compute(kind, params, compute, cache_dir=None):
+    """
+    Return the cached artifact for (kind, params), computing and saving it first
+    if needed. `compute()` returns (arrays, metadata); if it raises, nothing is cached.
+    """
+    path = artifact_path(kind, params, cache_dir)
+    if os.path.exists(path):
+        try:
+            return load_artifact(path)
+        except ValueError:
+            pass  # Unreadable or unsafe cache entry (e.g. from an older version); replace it
+    arrays, metadata = compute()
+    save_artifact(path, kind, arrays, dict(metadata, params=params))
+    return load_artifact(path)
+
+# ---------------------------------------------------------------------------
+# Conversions for the repository's result types
+# ---------------------------------------------------------------------------
+
+def strategy_table_to_arrays(table):
+    """Encode {(player card values, upcard): actions} as fixed-width arrays"""
+    keys = sorted(table)
+    max_cards = max(len(hand) for hand, _ in keys)
+    hands = np.zeros((len(keys), max_cards), dtype=np.int8)  # 0 pads short hands
+    for i, (hand, _) in enumerate(keys):
+        hands[i, :len(hand)] = hand
+    upcards = np.array([upcard for _, upcard in keys], dtype=np.int8)
+    actions = np.array([table[key] for key in keys], dtype="S4")
+    return {"hands": hands, "upcards": upcards, "actions": actions}
+
+def arrays_to_strategy_table(artifact):
+    hands, upcards, actions = artifact["hands"], artifact["upcards"], artifact["actions"]
+    return {(tuple(int(v) for v in hand if v), int(upcard)): action.decode()
+            for hand, upcard, action in zip(hands, upcards, actions)}
+
+def accumulator_to_arrays(accumulator):
+    """Encode a SimulationAccumulator's per-count histogram as arrays plus overall metadata"""
+    counts = sorted(accumulator.by_count)
+    stats = np.array([accumulator.by_count[count] for count in counts], dtype=float).reshape(-1, 3)
+    arrays = {"true_counts": np.array(counts, dtype=np.int64),
+              "hands": stats[:, 0].astype(np.int64), "mean": stats[:, 1], "m2": stats[:, 2]}
+    metadata = {"n": accumulator.n, "mean": accumulator.mean, "m2": accumulator.m2}
+    return arrays, metadata
+
+def arrays_to_accumulator(artifact):
+    accumulator = SimulationAccumulator()
+    accumulator.n = artifact.metadata["n"]
+    accumulator.mean = artifact.metadata["mean"]
+    accumulator.m2 = artifact.metadata["m2"]
+    accumulator.by_count = {int(count): [int(n), float(mean), float(m2)] for count, n, mean, m2 in
+                            zip(artifact["true_counts"], artifact["hands"], artifact["mean"], artifact["m2"])}
+    return accumulator
+
+def load_ev_by_count(path, mmap=True):
+    """Open an EV-by-count artifact; its histogram columns are read only when used"""
+    artifact = load_artifact(path, mmap)
+    if artifact.kind != "ev_by_count":
+        raise ValueError(f"{path} holds a {artifact.kind!r} artifact, not an EV-by-count histogram")
+    return artifact
+
+def ev_by_count_summary(artifact):
+    """Hands, house edge, standard error and {true count: (hands, EV, standard error)} of an EV-by-count artifact"""
+    accumulator = arrays_to_accumulator(artifact)
+    return {"hands": accumulator.n, "house_edge": accumulator.house_edge,
+            "std_error": accumulator.std_error, "ev_by_count": accumulator.ev_by_count()}
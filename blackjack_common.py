@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import sys
+
+SIMULATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Monte Carlo Simulation.py")
+
+def load_simulator():
+    """Import "Monte Carlo Simulation.py", whose file name is not a valid module name"""
+    if "monte_carlo_simulation" not in sys.modules:
+        spec = importlib.util.spec_from_file_location("monte_carlo_simulation", SIMULATOR_PATH)
+        module = importlib.util.module_from_spec(spec)
+        # Registered before executing so its functions pickle by this name. Spawned
+        # workers start without it: pools must run load_simulator as their initializer
+        sys.modules["monte_carlo_simulation"] = module
+        spec.loader.exec_module(module)
+    return sys.modules["monte_carlo_simulation"]
+
+class SimulationAccumulator:
+    """
+    Mergeable simulation statistics: hands, mean and sum of squared deviations
+    of the hand profit overall and per (rounded) true count. Partial results
+    from any number of workers combine exactly with `merge`.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.by_count = {}  # true count -> [n, mean, m2]
+
+    def add(self, profit, true_count):
+        self.n, self.mean, self.m2 = _welford(self.n, self.mean, self.m2, profit)
+        bucket = self.by_count.setdefault(int(round(true_count)), [0, 0.0, 0.0])
+        bucket[:] = _welford(*bucket, profit)
+
+    def merge(self, other):
+        self.n, self.mean, self.m2 = _combine((self.n, self.mean, self.m2), (other.n, other.mean, other.m2))
+        for count, stats in other.by_count.items():
+            self.by_count[count] = list(_combine(self.by_count.get(count, (0, 0.0, 0.0)), stats))
+        return self
+
+    @property
+    def house_edge(self):
+        return -self.mean
+
+    @property
+    def std_error(self):
+        return (self.m2 / (self.n - 1) / self.n) ** 0.5 if self.n > 1 else float("inf")
+
+    def ev_by_count(self):
+        """{true count: (hands, EV per hand, standard error)}"""
+        return {count: (n, mean, (m2 / (n - 1) / n) ** 0.5 if n > 1 else float("inf"))
+                for count, (n, mean, m2) in sorted(self.by_count.items())}
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2,
+                "by_count": {str(count): stats for count, stats in self.by_count.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = cls()
+        accumulator.n, accumulator.mean, accumulator.m2 = data["n"], data["mean"], data["m2"]
+        accumulator.by_count = {int(count): list(stats) for count, stats in data["by_count"].items()}
+        return accumulator
+
+def _welford(n, mean, m2, x):
+    n += 1
+    delta = x - mean
+    mean += delta / n
+    return n, mean, m2 + delta * (x - mean)
+
+def _combine(a, b):
+    """Combine (n, mean, m2) of two samples (Chan et al.)"""
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n
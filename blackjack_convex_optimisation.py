@@ -1,41 +1,363 @@
 import cvxpy as cp
 import numpy as np
 
-# Suppose we discretize the card count into N states
-N = 1000  # number of count states
+# Per-hand variance of blackjack outcomes in units of the initial bet
+HAND_VARIANCE = 1.33
 
-# Expected value per hand for each count state (for illustration)
-expected_ev = np.zeros(N)
-# Assign some positive EVs for high counts (e.g., last 10 states)
-expected_ev[-10:] = np.linspace(0.01, 0.025, 10)
-# Assign some slightly negative EVs for low counts (e.g., first 10 states)
-expected_ev[:10] = np.linspace(-0.01, -0.005, 10)
+# Part of cached optimizer result keys: bump it whenever the optimizers or their
+# objectives change, so results cached from the old code are not reused
+OPTIMIZER_VERSION = 1
 
-# Probability of each count state (uniform for illustration)
-prob_state = np.ones(N) / N
+def _solve(problem):
+    """Solve a cvxpy problem, raising ValueError unless an optimum was found"""
+    problem.solve()
+    if problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+        raise ValueError(f"Bet optimization failed: the problem is {problem.status}")
 
-# Decision variables: bet size for each count state
-x = cp.Variable(N)
+def optimize_bets(expected_ev, prob_state, x_min=1.0, x_max=100.0, total_bankroll=None):
+    """
+    Maximize expected profit per hand over bet sizes for each count state
+    Returns: (optimal bet sizes, maximum expected profit per hand)
+    """
+    N = len(expected_ev)
 
-# Table limits
-x_min = 1.0   # minimum bet
-x_max = 100.0 # maximum bet
+    # Decision variables: bet size for each count state
+    x = cp.Variable(N)
 
-# Objective: maximize expected profit across all count states
-objective = cp.Maximize(cp.sum(cp.multiply(prob_state, expected_ev * x)))
+    # Objective: maximize expected profit across all count states
+    objective = cp.Maximize(cp.sum(cp.multiply(prob_state * expected_ev, x)))
 
-# Constraints
-constraints = [
-    x >= x_min,
-    x <= x_max
-    # Optionally: cp.sum(x) <= total_bankroll
-]
+    # Constraints
+    constraints = [
+        x >= x_min,
+        x <= x_max
+    ]
+    if total_bankroll is not None:
+        constraints.append(cp.sum(x) <= total_bankroll)
 
-# Problem definition
-problem = cp.Problem(objective, constraints)
+    # Problem definition
+    problem = cp.Problem(objective, constraints)
 
-# Solve
-problem.solve()
+    # Solve
+    _solve(problem)
 
-print("Optimal bet sizes for each count state:", x.value)
-print("Maximum expected profit per hand:", problem.value)
+    return x.value, problem.value
+
+class ScenarioSet:
+    """
+    Weighted hand-outcome scenarios per count state, reduced while streaming.
+    Outcomes are rounded to `decimals` and identical (count state, unit profit)
+    pairs are merged, so millions of simulated hands collapse to a handful of
+    scenarios per count state (blackjack payouts are a small discrete set).
+    """
+    def __init__(self, num_states, decimals=3):
+        self.num_states = num_states
+        self.decimals = decimals
+        # Scenario keys pack (count state, rounded profit) into one int64
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0)
+
+    def add(self, count_states, unit_profits, weights=None):
+        """Add a chunk of recorded (count state, profit per unit bet) outcomes"""
+        if weights is None:
+            weights = np.ones(len(count_states))
+        codes = np.round(np.asarray(unit_profits, dtype=float) * 10 ** self.decimals).astype(np.int64)
+        keys = (np.asarray(count_states, dtype=np.int64) << 32) + (codes + 2 ** 31)
+
+        keys, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, weights]))
+        self.keys = keys
+        return self
+
+    @property
+    def states(self):
+        return (self.keys >> 32).astype(int)
+
+    @property
+    def profits(self):
+        return ((self.keys & 0xFFFFFFFF) - 2 ** 31) / 10 ** self.decimals
+
+    @property
+    def weights(self):
+        """Empirical probability of each scenario"""
+        return self.counts / self.counts.sum()
+
+    def expected_ev(self):
+        """Expected profit per unit bet for each count state"""
+        states = self.states
+        ev = np.bincount(states, weights=self.counts * self.profits, minlength=self.num_states)
+        hands = np.bincount(states, weights=self.counts, minlength=self.num_states)
+        return np.divide(ev, hands, out=np.zeros(self.num_states), where=hands > 0)
+
+def _observed_states(scenarios):
+    """Count states with at least one scenario, and each scenario's index into them"""
+    observed, scenario_index = np.unique(scenarios.states, return_inverse=True)
+    return observed, scenario_index
+
+def _fill_unobserved(scenarios, observed, observed_bets, x_min):
+    """
+    Bets for every count state. States without scenarios do not enter the
+    objective, so nothing supports raising them: they get the minimum bet.
+    """
+    bets = np.full(scenarios.num_states, float(x_min))
+    bets[observed] = observed_bets
+    return bets
+
+def optimize_bets_kelly(scenarios, bankroll, x_min=1.0, x_max=100.0):
+    """
+    Maximize expected log-growth of the bankroll (Kelly criterion) per hand.
+    Count states without scenarios get the minimum bet.
+    Returns: (optimal bet sizes, expected log-growth per hand)
+    """
+    observed, scenario_index = _observed_states(scenarios)
+    x = cp.Variable(len(observed))
+    growth = cp.log(1 + cp.multiply(scenarios.profits / bankroll, x[scenario_index]))
+
+    # Scenario weights are tiny for large sets; rescale so solver tolerances still bite
+    scale = 1 / scenarios.weights.max()
+    objective = cp.Maximize(scale * scenarios.weights @ growth)
+
+    problem = cp.Problem(objective, [x >= x_min, x <= x_max])
+    _solve(problem)
+
+    return _fill_unobserved(scenarios, observed, x.value, x_min), problem.value / scale
+
+def optimize_bets_cvar(scenarios, cvar_limit, alpha=0.95, x_min=1.0, x_max=100.0, total_bankroll=None):
+    """
+    Maximize expected profit per hand subject to a CVaR limit on the hand loss:
+    the expected loss in the worst (1 - alpha) tail of outcomes must not exceed
+    `cvar_limit` (Rockafellar-Uryasev formulation). Count states without
+    scenarios get the minimum bet.
+    Returns: (optimal bet sizes, maximum expected profit per hand)
+    """
+    observed, scenario_index = _observed_states(scenarios)
+    x = cp.Variable(len(observed))
+    t = cp.Variable()
+    profit = cp.multiply(scenarios.profits, x[scenario_index])
+
+    objective = cp.Maximize(scenarios.weights @ profit)
+    constraints = [
+        x >= x_min,
+        x <= x_max,
+        t + scenarios.weights @ cp.pos(-profit - t) / (1 - alpha) <= cvar_limit
+    ]
+    if total_bankroll is not None:
+        # Unobserved count states still take the minimum bet
+        constraints.append(cp.sum(x) + x_min * (scenarios.num_states - len(observed)) <= total_bankroll)
+
+    problem = cp.Problem(objective, constraints)
+    _solve(problem)
+
+    return _fill_unobserved(scenarios, observed, x.value, x_min), problem.value
+
+def _ramp_step(best, value):
+    """DP table after one more count state: keep the bet, or raise it using one more level"""
+    # Best earlier total at any strictly lower level, using one level fewer
+    step_up = np.full(best.shape, -np.inf)
+    step_up[1:, 1:] = np.maximum.accumulate(best[:-1], axis=1)[:, :-1]
+    return np.maximum(step_up, best) + value
+
+def optimize_bet_ramp(expected_ev, prob_state, x_min=1.0, x_max=100.0, chip=1.0, max_levels=5,
+                      variance=HAND_VARIANCE, bankroll=None):
+    """
+    Best monotone bet ramp in chip multiples with at most `max_levels` distinct bets.
+    Count states are taken in order (low to high count) and bets may only rise.
+    Without a bankroll the objective is expected profit per hand; with one it is
+    the Kelly growth approximation ev * x - variance * x^2 / (2 * bankroll).
+    Solved by dynamic programming over (count state, levels used, bet level),
+    which is O(N * max_levels * number of chip levels) in time. Backtracking
+    recomputes the DP tables from checkpoints every sqrt(N) states, so memory
+    is O(sqrt(N) * max_levels * number of chip levels).
+    Returns: (bet sizes, objective value per hand)
+    """
+    expected_ev = np.asarray(expected_ev, dtype=float)
+    prob_state = np.asarray(prob_state, dtype=float)
+    variance = np.broadcast_to(np.asarray(variance, dtype=float), expected_ev.shape)
+    risk = 0.0 if bankroll is None else 1.0 / bankroll
+    if chip <= 0:
+        raise ValueError("The chip size must be positive")
+    if max_levels < 1:
+        raise ValueError("A bet ramp needs at least one level")
+    if bankroll is not None and bankroll <= 0:
+        raise ValueError("The bankroll must be positive")
+
+    levels = chip * np.arange(np.ceil(x_min / chip - 1e-9), np.floor(x_max / chip + 1e-9) + 1)
+    if len(levels) == 0:
+        raise ValueError("No chip multiple lies between the minimum and maximum bet")
+
+    N, K, M = len(expected_ev), max_levels, len(levels)
+    def value(i):
+        """Contribution of count state i when betting each level"""
+        return prob_state[i] * (expected_ev[i] * levels - risk * variance[i] * levels ** 2 / 2)
+
+    # best[k, m]: best total so far with k + 1 distinct levels, current bet levels[m].
+    # Only every `stride`-th table is kept; backtracking recomputes the rest a segment at a time
+    stride = max(1, int(np.ceil(np.sqrt(N))))
+    best = np.full((K, M), -np.inf)
+    best[0] = value(0)
+    checkpoints = {0: best}
+    for i in range(1, N):
+        best = _ramp_step(best, value(i))
+        if i % stride == 0:
+            checkpoints[i] = best
+
+    # Backtrack from the best final state
+    k, m = np.unravel_index(np.argmax(best), best.shape)
+    objective_value = best[k, m]
+    bets = np.empty(N)
+    segment = {}
+    for i in range(N - 1, -1, -1):
+        bets[i] = levels[m]
+        if i == 0 or k == 0 or m == 0:
+            continue
+        if i - 1 not in segment:
+            start = (i - 1) // stride * stride
+            segment = {start: checkpoints[start]}
+            for j in range(start + 1, i):
+                segment[j] = _ramp_step(segment[j - 1], value(j))
+        # Same choice as _ramp_step: raise only if strictly better, from the highest best lower level
+        before = segment[i - 1]
+        lower = before[k - 1, :m]
+        if lower.max() > before[k, m]:
+            m = np.flatnonzero(lower == lower.max())[-1]
+            k -= 1
+
+    return bets, objective_value
+
+def simulate_bankroll(optimal_bets, expected_ev, prob_state, variance=HAND_VARIANCE,
+                      bankroll=10000.0, hands_per_session=1000, num_paths=100000,
+                      outcomes=None, chunk_size=100000, seed=None):
+    """
+    Backtest a bet spread on a finite bankroll over many sessions at once.
+    Each step draws a count state and a hand outcome for every path as NumPy
+    arrays. Outcomes are normal with the given per-count EV and variance
+    (per unit bet), or bootstrapped from a recorded outcome stream passed as
+    `outcomes=(count_states, unit_profits)`. A path is ruined when its
+    bankroll reaches zero and stops betting.
+    Returns: dict with risk of ruin, N0, drawdown quantiles and final bankroll stats
+    """
+    rng = np.random.default_rng(seed)
+    bets = np.asarray(optimal_bets, dtype=float)
+    expected_ev = np.asarray(expected_ev, dtype=float)
+    prob_state = np.asarray(prob_state, dtype=float)
+    std = np.sqrt(np.broadcast_to(np.asarray(variance, dtype=float), expected_ev.shape))
+    cdf = np.cumsum(prob_state)
+    cdf /= cdf[-1]
+
+    # Per-state profit mean and spread for the given bets
+    profit_mean = bets * expected_ev
+    profit_std = bets * std
+
+    if outcomes is not None:
+        outcome_states = np.asarray(outcomes[0], dtype=int)
+        outcome_profits = np.asarray(outcomes[1], dtype=float)
+
+    ruined_paths = 0
+    max_drawdowns = []
+    final_bankrolls = []
+
+    # Paths are simulated in chunks to bound memory
+    for start in range(0, num_paths, chunk_size):
+        m = min(chunk_size, num_paths - start)
+        bank = np.full(m, float(bankroll))
+        peak = bank.copy()
+        max_drawdown = np.zeros(m)
+        ruined = np.zeros(m, dtype=bool)
+
+        for _ in range(hands_per_session):
+            if outcomes is None:
+                states = np.searchsorted(cdf, rng.random(m), side='right')
+                profit = rng.standard_normal(m)
+                profit *= profit_std[states]
+                profit += profit_mean[states]
+            else:
+                rows = rng.integers(len(outcome_states), size=m)
+                profit = bets[outcome_states[rows]] * outcome_profits[rows]
+
+            # Ruined paths stop betting
+            profit *= ~ruined
+            bank += profit
+            ruined |= bank <= 0
+            np.maximum(bank, 0.0, out=bank)
+            np.maximum(peak, bank, out=peak)
+            np.maximum(max_drawdown, peak - bank, out=max_drawdown)
+
+        ruined_paths += ruined.sum()
+        max_drawdowns.append(max_drawdown)
+        final_bankrolls.append(bank)
+
+    max_drawdowns = np.concatenate(max_drawdowns)
+    final_bankrolls = np.concatenate(final_bankrolls)
+
+    # N0: hands needed for the expected win to equal one standard deviation
+    if outcomes is None:
+        mean = np.sum(prob_state * expected_ev * bets)
+        second_moment = np.sum(prob_state * bets ** 2 * (std ** 2 + expected_ev ** 2))
+    else:
+        hand_profits = bets[outcome_states] * outcome_profits
+        mean = hand_profits.mean()
+        second_moment = np.mean(hand_profits ** 2)
+    hand_variance = second_moment - mean ** 2
+    n0 = hand_variance / mean ** 2 if mean > 0 else np.inf
+
+    return {
+        "risk_of_ruin": float(ruined_paths / num_paths),
+        "n0": float(n0),
+        "expected_profit_per_hand": float(mean),
+        "drawdown_quantiles": dict(zip((0.5, 0.9, 0.99),
+                                       np.quantile(max_drawdowns, [0.5, 0.9, 0.99]).tolist())),
+        "final_bankroll_mean": float(final_bankrolls.mean()),
+        "final_bankroll_quantiles": dict(zip((0.01, 0.5, 0.99),
+                                             np.quantile(final_bankrolls, [0.01, 0.5, 0.99]).tolist())),
+    }
+
+if __name__ == "__main__":
+    # Suppose we discretize the card count into N states
+    N = 1000  # number of count states
+
+    # Expected value per hand for each count state (for illustration)
+    expected_ev = np.zeros(N)
+    # Assign some positive EVs for high counts (e.g., last 10 states)
+    expected_ev[-10:] = np.linspace(0.01, 0.025, 10)
+    # Assign some slightly negative EVs for low counts (e.g., first 10 states)
+    expected_ev[:10] = np.linspace(-0.01, -0.005, 10)
+
+    # Probability of each count state (uniform for illustration)
+    prob_state = np.ones(N) / N
+
+    # Table limits
+    x_min = 1.0   # minimum bet
+    x_max = 100.0 # maximum bet
+
+    optimal_bets, expected_profit = optimize_bets(expected_ev, prob_state, x_min, x_max)
+
+    print("Optimal bet sizes for each count state:", optimal_bets)
+    print("Maximum expected profit per hand:", expected_profit)
+
+    # Integer ramp: $5 chips, at most 4 distinct bets, Kelly-penalized on a 10000 bankroll
+    ramp_bets, ramp_value = optimize_bet_ramp(expected_ev, prob_state, x_min=5.0, x_max=x_max,
+                                              chip=5.0, max_levels=4, bankroll=10000.0)
+    print("Bet ramp levels:", np.unique(ramp_bets))
+    print("Bet ramp objective per hand:", ramp_value)
+
+    # Risk-aware spreads from hand outcome scenarios (even-money hands with per-count EV);
+    # recorded simulator outcomes can be streamed in with repeated scenarios.add calls
+    states = np.arange(N)
+    scenarios = ScenarioSet(N)
+    scenarios.add(states, np.ones(N), prob_state * (1 + expected_ev) / 2)
+    scenarios.add(states, -np.ones(N), prob_state * (1 - expected_ev) / 2)
+    print("Scenarios after reduction:", len(scenarios.states))
+
+    kelly_bets, growth = optimize_bets_kelly(scenarios, bankroll=10000.0, x_min=x_min, x_max=x_max)
+    print("Kelly bet sizes for the highest count states:", kelly_bets[-10:])
+    print("Expected log-growth per hand:", growth)
+
+    cvar_bets, cvar_profit = optimize_bets_cvar(scenarios, cvar_limit=5.0, x_min=x_min, x_max=x_max)
+    print("CVaR-limited bet sizes for the highest count states:", cvar_bets[-10:])
+    print("Expected profit per hand under CVaR limit:", cvar_profit)
+
+    # Backtest the spread on a finite bankroll
+    backtest = simulate_bankroll(optimal_bets, expected_ev, prob_state)
+    print("Risk of ruin:", backtest["risk_of_ruin"])
+    print("N0 (hands):", backtest["n0"])
+    print("Max drawdown quantiles:", backtest["drawdown_quantiles"])
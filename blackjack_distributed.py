@@ -0,0 +1,315 @@
+import argparse
+import json
+import multiprocessing
+import random
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+
+from blackjack_artifacts import (accumulator_to_arrays, arrays_to_accumulator, ev_by_count_summary,
+                                 load_ev_by_count, load_or_compute, save_artifact)
+from blackjack_common import SimulationAccumulator, load_simulator
+
+DEFAULT_PORT = 8766
+
+def simulate_range(num_hands, seed, num_decks=6, penetration=0.75):
+    """Play a seeded range of hands on a fresh shoe; the same seed always gives the same hands"""
+    simulator = load_simulator()
+    deck = simulator.Deck(num_decks, penetration, rng=random.Random(seed))
+    accumulator = SimulationAccumulator()
+    for _ in range(num_hands):
+        # Shuffle first so the hand is filed under the count of the shoe it is dealt from
+        if deck.needs_shuffle():
+            deck.reset()
+        true_count = deck.true_count()
+        accumulator.add(simulator.play_hand(deck), true_count)
+    return accumulator
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+class Coordinator:
+    """
+    Hands out seed-indexed hand ranges to workers and merges their accumulators.
+    Range i covers hands [i * range_hands, (i + 1) * range_hands) and is played
+    with seed base_seed + i, so a reissued range reproduces the same hands.
+    Ranges held by a worker that disconnects go back to the queue; ranges that
+    stay outstanding longer than `task_timeout` are reissued to idle workers,
+    and whichever copy finishes first is merged. Ranges are merged in index
+    order, so a fixed base seed gives the same result to the last bit with any
+    number of workers.
+    """
+    def __init__(self, num_hands, range_hands=100000, num_decks=6, penetration=0.75,
+                 base_seed=None, task_timeout=600.0):
+        self.num_hands = num_hands
+        self.range_hands = range_hands
+        self.params = {"num_decks": num_decks, "penetration": penetration}
+        self.base_seed = random.randrange(2**32) if base_seed is None else base_seed
+        self.task_timeout = task_timeout
+
+        num_ranges = -(-num_hands // range_hands)
+        self.pending = deque(range(num_ranges))
+        self.issued = {}  # range index -> time issued
+        self.holders = {}  # range index -> worker it was last issued to
+        self.completed = set()
+        self.unmerged = {}  # finished ranges waiting for every lower range to finish
+        self.next_merge = 0
+        self.num_ranges = num_ranges
+        self.result = SimulationAccumulator()
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if num_ranges == 0:
+            self.finished.set()
+
+    def range_task(self, index):
+        hands = min(self.range_hands, self.num_hands - index * self.range_hands)
+        return {"type": "task", "range": index, "hands": hands,
+                "seed": self.base_seed + index, "params": self.params}
+
+    def next_task(self, holder=None):
+        with self.lock:
+            if self.finished.is_set():
+                return {"type": "done"}
+            if self.pending:
+                index = self.pending.popleft()
+            else:
+                now = time.monotonic()
+                overdue = [i for i, issued in self.issued.items() if now - issued > self.task_timeout]
+                if not overdue:
+                    return {"type": "wait", "seconds": 0.5}
+                index = min(overdue, key=self.issued.get)
+            self.issued[index] = time.monotonic()
+            self.holders[index] = holder
+            return self.range_task(index)
+
+    def complete(self, index, accumulator):
+        with self.lock:
+            if index in self.completed:
+                return  # A reissued duplicate finished second
+            self.completed.add(index)
+            self.issued.pop(index, None)
+            self.holders.pop(index, None)
+            # Merge in range order, so the result does not depend on completion order
+            self.unmerged[index] = accumulator
+            while self.next_merge in self.unmerged:
+                self.result.merge(self.unmerged.pop(self.next_merge))
+                self.next_merge += 1
+            if len(self.completed) == self.num_ranges:
+                self.finished.set()
+
+    def release(self, indices, holder=None):
+        """
+        Return ranges held by a lost worker to the front of the queue.
+        A range reissued since to another worker stays with that worker.
+        """
+        with self.lock:
+            for index in indices:
+                if index in self.issued and self.holders.get(index) is holder:
+                    del self.issued[index]
+                    del self.holders[index]
+                    self.pending.appendleft(index)
+
+    def serve(self, host="0.0.0.0", port=DEFAULT_PORT):
+        """Start accepting workers in a background thread; returns the server"""
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                held = set()
+                try:
+                    for line in self.rfile:
+                        message_type, index, accumulator = parse_worker_message(json.loads(line),
+                                                                                coordinator.num_ranges)
+                        if message_type == "result":
+                            held.discard(index)
+                            coordinator.complete(index, accumulator)
+                        reply = coordinator.next_task(holder=self)
+                        if reply["type"] == "task":
+                            held.add(reply["range"])
+                        self.wfile.write((json.dumps(reply) + "\n").encode())
+                        if reply["type"] == "done":
+                            break
+                except (ConnectionError, ValueError):
+                    pass
+                finally:
+                    coordinator.release(held, holder=self)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        server = Server((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def summary(self):
+        return {"hands": self.result.n, "house_edge": self.result.house_edge,
+                "std_error": self.result.std_error, "ev_by_count": self.result.ev_by_count()}
+
+def parse_worker_message(message, num_ranges):
+    """Check a decoded worker message; returns (message type, range index, accumulator)"""
+    if not isinstance(message, dict):
+        raise ValueError("a message must be a JSON object")
+    message_type = message.get("type")
+    if message_type in ("hello", "ready"):
+        return message_type, None, None
+    if message_type != "result":
+        raise ValueError(f"unknown message type: {message_type!r}")
+
+    index = message.get("range")
+    if isinstance(index, bool) or not isinstance(index, int) or not 0 <= index < num_ranges:
+        raise ValueError(f"'range' must be a range index below {num_ranges}")
+    data = message.get("accumulator")
+    if not (isinstance(data, dict) and isinstance(data.get("by_count"), dict)
+            and all(_is_number(data.get(field)) for field in ("n", "mean", "m2"))
+            and all(isinstance(stats, list) and len(stats) == 3 and all(map(_is_number, stats))
+                    for stats in data["by_count"].values())):
+        raise ValueError("'accumulator' must hold numeric n, mean, m2 and by_count statistics")
+    try:
+        accumulator = SimulationAccumulator.from_dict(data)
+    except ValueError as e:  # A count key that is not an integer
+        raise ValueError(f"malformed accumulator: {e}") from e
+    return message_type, index, accumulator
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def run_worker(host="127.0.0.1", port=DEFAULT_PORT, max_ranges=None):
+    """
+    Connect to a coordinator and play ranges until it reports the campaign done.
+    `max_ranges` makes the worker quit early (useful to exercise worker loss).
+    """
+    with socket.create_connection((host, port)) as connection, connection.makefile("rwb") as stream:
+        message = {"type": "hello"}
+        ranges_played = 0
+        while True:
+            stream.write((json.dumps(message) + "\n").encode())
+            stream.flush()
+            line = stream.readline()
+            if not line:
+                return
+            task = json.loads(line)
+            if task["type"] == "done":
+                return
+            if task["type"] == "wait":
+                time.sleep(task["seconds"])
+                message = {"type": "ready"}
+                continue
+            if max_ranges is not None and ranges_played >= max_ranges:
+                return  # Simulated worker loss while holding a range
+            accumulator = simulate_range(task["hands"], task["seed"], **task["params"])
+            ranges_played += 1
+            message = {"type": "result", "range": task["range"], "accumulator": accumulator.to_dict()}
+
+def run_local_campaign(num_hands, num_workers=4, range_hands=100000, num_decks=6, penetration=0.75,
+                       base_seed=None, port=0, return_accumulator=False):
+    """
+    Run a coordinator and several worker processes on this machine.
+    Raises RuntimeError if every worker exits before the campaign is done.
+    """
+    coordinator = Coordinator(num_hands, range_hands, num_decks, penetration, base_seed)
+    server = coordinator.serve("127.0.0.1", port)
+    port = server.server_address[1]
+
+    workers = [multiprocessing.Process(target=run_worker, args=("127.0.0.1", port)) for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        while not coordinator.finished.wait(1.0):
+            if not any(worker.is_alive() for worker in workers):
+                # A worker may have delivered the last range just before exiting
+                if coordinator.finished.is_set():
+                    break
+                raise RuntimeError(f"All workers exited with {coordinator.num_ranges - len(coordinator.completed)} "
+                                   f"of {coordinator.num_ranges} ranges unfinished")
+        for worker in workers:
+            worker.join()
+    finally:
+        server.shutdown()
+        server.server_close()
+    if return_accumulator:
+        return coordinator.summary(), coordinator.result
+    return coordinator.summary()
+
+def load_campaign_result(num_hands, num_workers=4, range_hands=100000, num_decks=6, penetration=0.75,
+                         base_seed=0, cache_dir=None):
+    """
+    EV-by-count artifact of a seeded local campaign, run once and then reused
+    from the artifact cache. The worker count is not part of the key: ranges
+    merge in order, so it does not change the result.
+    """
+    def compute():
+        _, result = run_local_campaign(num_hands, num_workers, range_hands, num_decks, penetration,
+                                       base_seed, return_accumulator=True)
+        return accumulator_to_arrays(result)
+
+    params = {"num_hands": num_hands, "range_hands": range_hands, "num_decks": num_decks,
+              "penetration": penetration, "base_seed": base_seed,
+              "simulator_version": load_simulator().SIMULATOR_VERSION}
+    return load_or_compute("ev_by_count", params, compute, cache_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed blackjack simulation campaign")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="Hand out ranges and merge results")
+    coordinator_parser.add_argument("--hands", type=int, required=True)
+    coordinator_parser.add_argument("--range-hands", type=int, default=100000)
+    coordinator_parser.add_argument("--decks", type=int, default=6)
+    coordinator_parser.add_argument("--penetration", type=float, default=0.75)
+    coordinator_parser.add_argument("--seed", type=int, default=None)
+    coordinator_parser.add_argument("--host", default="0.0.0.0")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    worker_parser = subparsers.add_parser("worker", help="Play ranges for a coordinator")
+    worker_parser.add_argument("--host", default="127.0.0.1")
+    worker_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    local_parser = subparsers.add_parser("local", help="Coordinator and workers on this machine")
+    local_parser.add_argument("--hands", type=int, default=1000000)
+    local_parser.add_argument("--workers", type=int, default=4)
+    local_parser.add_argument("--range-hands", type=int, default=100000)
+    local_parser.add_argument("--seed", type=int, default=None,
+                              help="Base seed; seeded campaigns are cached and reused")
+
+    show_parser = subparsers.add_parser("show", help="Print a saved EV-by-count histogram")
+    show_parser.add_argument("path")
+
+    for campaign_parser in (coordinator_parser, local_parser):
+        campaign_parser.add_argument("--output", help="Save the merged EV-by-count histogram as an artifact")
+
+    args = parser.parse_args()
+    if args.mode == "worker":
+        run_worker(args.host, args.port)
+    else:
+        result = None
+        if args.mode == "show":
+            summary = ev_by_count_summary(load_ev_by_count(args.path))
+        elif args.mode == "coordinator":
+            coordinator = Coordinator(args.hands, args.range_hands, args.decks, args.penetration, args.seed)
+            coordinator.serve(args.host, args.port)
+            print(f"Coordinator waiting for workers on {args.host}:{args.port}")
+            coordinator.finished.wait()
+            summary = coordinator.summary()
+            result = coordinator.result
+        elif args.seed is not None:
+            artifact = load_campaign_result(args.hands, args.workers, args.range_hands, base_seed=args.seed)
+            summary, result = ev_by_count_summary(artifact), arrays_to_accumulator(artifact)
+        else:
+            summary, result = run_local_campaign(args.hands, args.workers, args.range_hands, return_accumulator=True)
+
+        if result is not None and args.output:
+            arrays, metadata = accumulator_to_arrays(result)
+            save_artifact(args.output, "ev_by_count", arrays, metadata)
+
+        print(f"Hands: {summary['hands']:,}")
+        print(f"Estimated house edge: {summary['house_edge']:.4%} ± {summary['std_error']:.4%}")
+        for count, (hands, ev, error) in summary["ev_by_count"].items():
+            print(f"True count {count:+d}: EV {ev:+.4%} ± {error:.4%} ({hands:,} hands)")
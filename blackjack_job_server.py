@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import heapq
+import importlib
+import itertools
+import json
+import os
+import random
+import socket
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from blackjack_common import load_simulator
+
+DEFAULT_PORT = 8765
+
+# ---------------------------------------------------------------------------
+# Work run inside the warm worker processes
+# ---------------------------------------------------------------------------
+
+def warm_worker():
+    """Pay for imports and first-use costs once per worker process"""
+    importlib.import_module("blackjack_convex_optimisation")
+    simulator = load_simulator()
+    simulator.play_hand(simulator.Deck())
+    simulator.infinite_deck_house_edge()
+
+def simulate_chunk(num_hands, num_decks, penetration, seed):
+    """
+    Play a chunk of hands with its own seed
+    Returns: (hands, sum of profits, sum of squared profits)
+    """
+    simulator = load_simulator()
+    deck = simulator.Deck(num_decks, penetration, rng=random.Random(seed))
+    total = 0.0
+    total_sq = 0.0
+    for _ in range(num_hands):
+        profit = simulator.play_hand(deck)
+        total += profit
+        total_sq += profit * profit
+    return num_hands, total, total_sq
+
+def optimize(params):
+    """Run one of the bet optimizers on the given EVs and state probabilities"""
+    import blackjack_convex_optimisation as optimizer
+
+    expected_ev = np.asarray(params["expected_ev"], dtype=float)
+    prob_state = np.asarray(params.get("prob_state") or np.ones(len(expected_ev)) / len(expected_ev))
+    x_min = params.get("x_min", 1.0)
+    x_max = params.get("x_max", 100.0)
+
+    if params.get("solver", "lp") == "ramp":
+        bets, value = optimizer.optimize_bet_ramp(expected_ev, prob_state, x_min, x_max,
+                                                  chip=params.get("chip", 1.0),
+                                                  max_levels=params.get("max_levels", 5),
+                                                  bankroll=params.get("bankroll"))
+    else:
+        bets, value = optimizer.optimize_bets(expected_ev, prob_state, x_min, x_max,
+                                              total_bankroll=params.get("total_bankroll"))
+    return {"optimal_bets": bets.tolist(), "objective": float(value)}
+
+def infinite_deck(params):
+    simulator = load_simulator()
+    return {"house_edge": simulator.infinite_deck_house_edge(
+        blackjack_payout=params.get("blackjack_payout", 1.5))}
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class WorkerSlots:
+    """
+    One slot per warm worker, handed out in priority order (lower number first,
+    then first come first served). Every task sent to the worker pool holds a
+    slot, so the pool never has more than one task per worker waiting in it.
+    """
+    def __init__(self, count):
+        self.free = count
+        self.waiters = []  # heap of (priority, arrival, future)
+        self.arrivals = itertools.count()
+
+    async def acquire(self, priority):
+        if self.free > 0 and not self.waiters:
+            self.free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.arrivals), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Pass on a slot that was granted just as the waiter was cancelled
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():  # Skip waiters that were cancelled
+                future.set_result(None)
+                return
+        self.free += 1
+
+class JobServer:
+    """
+    Local job server: clients send newline-delimited JSON requests, every job
+    starts at once and each task it sends to the warm worker processes waits
+    for a free worker in priority order (lower number runs first), progress
+    and results stream back as JSON lines, and finished results are cached by
+    request so repeated requests are answered immediately.
+    """
+    def __init__(self, workers=None, chunk_hands=50000, cache_size=1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_hands = chunk_hands
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.job_ids = itertools.count(1)
+        self.jobs = set()
+        self.executor = None
+        self.slots = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+        # Start every worker now rather than on the first job
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor, int) for _ in range(self.workers)])
+
+        self.slots = WorkerSlots(self.workers)
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for job in list(self.jobs):
+            job.cancel()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle_client(self, reader, writer):
+        async def send(message):
+            writer.write((json.dumps(message) + "\n").encode())
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    job_type, params, priority = parse_request(request)
+                except ValueError as e:
+                    await send({"event": "error", "message": f"Invalid request: {e}"})
+                    continue
+
+                # Fix the seed of an unseeded simulation before the cache lookup, so one
+                # random run is never served as the answer to later unseeded requests
+                if job_type == "simulate" and "seed" not in params:
+                    params = dict(params, seed=random.randrange(2**32))
+
+                job_id = next(self.job_ids)
+                key = json.dumps({"type": job_type, "params": params}, sort_keys=True)
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    await send({"event": "result", "job_id": job_id, "cached": True, "result": self.cache[key]})
+                    continue
+
+                # Events from the job are forwarded to this client as they arrive
+                events = asyncio.Queue()
+                job = asyncio.create_task(self.run_job(job_type, params, priority, key, events))
+                self.jobs.add(job)
+                job.add_done_callback(self.jobs.discard)
+                await send({"event": "queued", "job_id": job_id})
+                while True:
+                    event = await events.get()
+                    await send(dict(event, job_id=job_id))
+                    if event["event"] in ("result", "error"):
+                        break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run_in_worker(self, priority, function, *args):
+        """Run a function in a warm worker once a worker slot is free for this priority"""
+        await self.slots.acquire(priority)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        # The slot stays taken until the worker is done, even if the job is abandoned
+        future.add_done_callback(lambda _: self.slots.release())
+        return await asyncio.shield(future)
+
+    async def run_job(self, job_type, params, priority, key, events):
+        try:
+            if job_type == "simulate":
+                result = await self.run_simulation(params, priority, events)
+            elif job_type == "optimize":
+                result = await self.run_in_worker(priority, optimize, params)
+            elif job_type == "infinite_deck":
+                result = await self.run_in_worker(priority, infinite_deck, params)
+            else:
+                raise ValueError(f"Unknown job type: {job_type}")
+        except Exception as e:
+            await events.put({"event": "error", "message": str(e)})
+            return
+
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        await events.put({"event": "result", "cached": False, "result": result})
+
+    async def run_simulation(self, params, priority, events):
+        """
+        Run a simulation in seeded chunks spread over the warm workers, reporting
+        the running estimate as each chunk finishes. Each chunk takes a worker
+        slot on its own, so a higher-priority job gets the next free worker
+        instead of waiting for the whole simulation.
+        """
+        num_hands = int(params.get("num_hands", 1000000))
+        num_decks = int(params.get("num_decks", 6))
+        penetration = float(params.get("penetration", 0.75))
+        seed = int(params["seed"])
+        if num_hands < 1:
+            raise ValueError("num_hands must be at least 1")
+        if num_decks < 1:
+            raise ValueError("num_decks must be at least 1")
+        if not 0 < penetration < 1:
+            raise ValueError("penetration must be between 0 and 1")
+
+        async def run_chunk(chunk, chunk_hands):
+            result = await self.run_in_worker(priority, simulate_chunk, chunk_hands,
+                                              num_decks, penetration, seed + chunk)
+            return chunk, result
+
+        tasks = [asyncio.create_task(run_chunk(chunk, min(self.chunk_hands, num_hands - start)))
+                 for chunk, start in enumerate(range(0, num_hands, self.chunk_hands))]
+        results = {}
+        hands, total, total_sq = 0, 0.0, 0.0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                chunk, (n, s, sq) = await next_done
+                results[chunk] = n, s, sq
+                hands, total, total_sq = hands + n, total + s, total_sq + sq
+                estimate = simulation_summary(hands, total, total_sq)
+                await events.put({"event": "progress", "done": hands, "total": num_hands, "estimate": estimate})
+        finally:
+            # After a failure, chunks still waiting for a worker are dropped
+            for task in tasks:
+                task.cancel()
+
+        # Sum in chunk order so the result does not depend on completion order
+        ordered = [results[chunk] for chunk in sorted(results)]
+        return dict(simulation_summary(*(sum(values) for values in zip(*ordered))), seed=seed)
+
+def parse_request(request):
+    """Check a decoded request line; returns (job type, params, priority)"""
+    if not isinstance(request, dict):
+        raise ValueError("a request must be a JSON object")
+    job_type = request.get("type")
+    params = request.get("params", {})
+    priority = request.get("priority", 0)
+    if not isinstance(job_type, str):
+        raise ValueError("'type' must be a string")
+    if not isinstance(params, dict):
+        raise ValueError("'params' must be a JSON object")
+    if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+        raise ValueError("'priority' must be a number")
+    return job_type, params, priority
+
+def simulation_summary(hands, total, total_sq):
+    mean = total / hands
+    variance = max(total_sq / hands - mean * mean, 0.0)
+    return {"hands": hands, "house_edge": -mean, "std_error": (variance / hands) ** 0.5}
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def submit_job(job_type, params=None, priority=0, host="127.0.0.1", port=DEFAULT_PORT,
+               unix_path=None, on_progress=None, timeout=None):
+    """
+    Submit a job to a running job server and wait for its result.
+    `on_progress` is called with each progress event while the job runs.
+    """
+    if unix_path:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(unix_path)
+    else:
+        connection = socket.create_connection((host, port))
+    connection.settimeout(timeout)
+
+    with connection, connection.makefile("rwb") as stream:
+        request = {"type": job_type, "params": params or {}, "priority": priority}
+        stream.write((json.dumps(request) + "\n").encode())
+        stream.flush()
+        for line in stream:
+            event = json.loads(line)
+            if event["event"] == "progress" and on_progress:
+                on_progress(event)
+            elif event["event"] == "result":
+                return event["result"]
+            elif event["event"] == "error":
+                raise RuntimeError(event["message"])
+    raise ConnectionError("Job server closed the connection before sending a result")
+
+async def serve(args):
+    server = JobServer(workers=args.workers, chunk_hands=args.chunk_hands)
+    await server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Job server listening on {where} with {server.workers} warm workers")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local job server for blackjack simulations and optimizations")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Listen on a Unix socket at this path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="Number of warm worker processes")
+    parser.add_argument("--chunk-hands", type=int, default=50000, help="Hands per progress update")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,122 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from blackjack_artifacts import (accumulator_to_arrays, arrays_to_accumulator, arrays_to_strategy_table,
+                                 artifact_path, ev_by_count_summary, load_artifact, load_ev_by_count,
+                                 load_or_compute, save_artifact, strategy_table_to_arrays)
+from blackjack_common import SimulationAccumulator, load_simulator
+
+ARRAYS = {
+    "scalar": np.float64(3.5),
+    "empty": np.zeros((0, 3)),
+    "ints": np.arange(12, dtype=np.int16).reshape(3, 4),
+    "transposed": np.arange(12.0).reshape(3, 4).T,
+    "strings": np.array([b"H", b"S", b"D", b"P"], dtype="S4"),
+}
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(tmp_path, mmap):
+    path = tmp_path / "arrays.bjart"
+    save_artifact(path, "test", ARRAYS, {"note": "round trip"})
+    artifact = load_artifact(path, mmap=mmap)
+    assert artifact.kind == "test"
+    assert artifact.metadata == {"note": "round trip"}
+    assert set(artifact.keys()) == set(ARRAYS)
+    for name, expected in ARRAYS.items():
+        assert artifact[name].shape == np.shape(expected)
+        assert artifact[name].dtype == np.asarray(expected).dtype
+        np.testing.assert_array_equal(artifact[name], expected)
+
+def test_object_arrays_are_rejected(tmp_path):
+    path = tmp_path / "objects.bjart"
+    with pytest.raises(ValueError):
+        save_artifact(path, "test", {"none": np.ascontiguousarray(None)})
+    assert not path.exists()
+
+def test_object_dtype_in_header_is_rejected(tmp_path):
+    path = tmp_path / "forged.bjart"
+    save_artifact(path, "test", {"value": np.float64(1.0)})
+    # Same-length edit so the header stays valid JSON
+    path.write_bytes(path.read_bytes().replace(b'"<f8"', b'"|O" '))
+    with pytest.raises(ValueError, match="object dtype"):
+        load_artifact(path)
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / "truncated.bjart"
+    save_artifact(path, "test", {"values": np.arange(1000.0)})
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ValueError, match="outside the file"):
+        load_artifact(path)
+
+def test_load_or_compute_caches_successes_only(tmp_path):
+    calls = []
+    def compute():
+        calls.append(1)
+        return {"values": np.arange(3)}, {"objective": 1.0}
+
+    first = load_or_compute("test", {"a": 1}, compute, cache_dir=tmp_path)
+    second = load_or_compute("test", {"a": 1}, compute, cache_dir=tmp_path)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(second["values"], first["values"])
+    assert second.metadata == {"objective": 1.0, "params": {"a": 1}}
+
+    def fail():
+        raise ValueError("infeasible")
+    with pytest.raises(ValueError):
+        load_or_compute("test", {"a": 2}, fail, cache_dir=tmp_path)
+    assert not os.path.exists(artifact_path("test", {"a": 2}, tmp_path))
+
+def test_unreadable_cache_entry_is_recomputed(tmp_path):
+    path = artifact_path("test", {"a": 1}, tmp_path)
+    with open(path, "wb") as f:
+        f.write(b"not an artifact")
+    artifact = load_or_compute("test", {"a": 1}, lambda: ({"values": np.ones(2)}, {}), cache_dir=tmp_path)
+    np.testing.assert_array_equal(artifact["values"], np.ones(2))
+
+def test_strategy_table_round_trip(tmp_path):
+    table = {((10, 6), 10): "H", ((11, 7), 6): "S", ((8, 8), 11): "P", ((2, 3, 6), 5): "D"}
+    path = tmp_path / "strategy.bjart"
+    save_artifact(path, "strategy", strategy_table_to_arrays(table))
+    assert arrays_to_strategy_table(load_artifact(path)) == table
+
+def sample_accumulator():
+    accumulator = SimulationAccumulator()
+    for profit, count in [(1.0, 0.2), (-1.0, -1.6), (1.5, 2.4), (0.0, 0.1), (-2.0, 3.9), (1.0, 0.4)]:
+        accumulator.add(profit, count)
+    return accumulator
+
+def test_accumulator_round_trip(tmp_path):
+    accumulator = sample_accumulator()
+    arrays, metadata = accumulator_to_arrays(accumulator)
+    path = tmp_path / "ev_by_count.bjart"
+    save_artifact(path, "ev_by_count", arrays, metadata)
+    loaded = arrays_to_accumulator(load_artifact(path))
+    assert (loaded.n, loaded.mean, loaded.m2) == (accumulator.n, accumulator.mean, accumulator.m2)
+    assert loaded.by_count == accumulator.by_count
+
+def test_ev_by_count_loader_matches_the_accumulator(tmp_path):
+    accumulator = sample_accumulator()
+    path = tmp_path / "ev_by_count.bjart"
+    save_artifact(path, "ev_by_count", *accumulator_to_arrays(accumulator))
+    summary = ev_by_count_summary(load_ev_by_count(path))
+    assert summary == {"hands": accumulator.n, "house_edge": accumulator.house_edge,
+                       "std_error": accumulator.std_error, "ev_by_count": accumulator.ev_by_count()}
+
+def test_ev_by_count_loader_rejects_other_artifacts(tmp_path):
+    path = tmp_path / "strategy.bjart"
+    save_artifact(path, "strategy", strategy_table_to_arrays({((10, 6), 10): "H"}))
+    with pytest.raises(ValueError, match="'strategy'"):
+        load_ev_by_count(path)
+
+def test_seeded_house_edge_is_simulated_once(tmp_path, monkeypatch):
+    simulator = load_simulator()
+    expected = simulator.monte_carlo_blackjack(2000, rng=random.Random(5))
+    assert simulator.load_monte_carlo_house_edge(2000, seed=5, cache_dir=tmp_path) == expected
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached result was simulated again")
+    monkeypatch.setattr(simulator, "monte_carlo_blackjack", fail)
+    assert simulator.load_monte_carlo_house_edge(2000, seed=5, cache_dir=tmp_path) == expected
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from blackjack_convex_optimisation import simulate_bankroll
+
+def test_zero_ev_on_a_small_bankroll_is_almost_surely_ruined():
+    result = simulate_bankroll([1.0], [0.0], [1.0], bankroll=3.0, hands_per_session=20000,
+                               num_paths=1000, seed=1)
+    assert result["risk_of_ruin"] > 0.95
+    assert result["n0"] == np.inf
+
+def test_risk_of_ruin_matches_the_drifting_random_walk():
+    ev, variance, bankroll = 0.02, 1.33, 25.0
+    result = simulate_bankroll([1.0], [ev], [1.0], variance=variance, bankroll=bankroll,
+                               hands_per_session=20000, num_paths=2000, seed=2)
+    # Infinite-horizon ruin probability of a Brownian motion with drift, exp(-2 * ev * B / var)
+    assert result["risk_of_ruin"] == pytest.approx(np.exp(-2 * ev * bankroll / variance), abs=0.04)
+
+@pytest.mark.parametrize("bet", [1.0, 25.0])
+def test_n0_of_a_single_state_is_variance_over_squared_ev(bet):
+    result = simulate_bankroll([bet], [0.02], [1.0], variance=1.33, hands_per_session=10, num_paths=10, seed=3)
+    assert result["n0"] == pytest.approx(1.33 / 0.02 ** 2)
+    assert result["expected_profit_per_hand"] == pytest.approx(bet * 0.02)
+
+def test_bootstrapped_outcomes_match_normal_outcomes_with_the_same_moments():
+    rng = np.random.default_rng(4)
+    states = rng.integers(2, size=200000)
+    # Blackjack-like payouts per unit bet, better in the high count state
+    payouts = np.array([-2.0, -1.0, 0.0, 1.0, 1.5, 2.0])
+    probs = np.array([[0.05, 0.45, 0.09, 0.33, 0.045, 0.035], [0.05, 0.42, 0.09, 0.35, 0.05, 0.04]])
+    profits = np.empty(len(states))
+    for state in range(2):
+        profits[states == state] = rng.choice(payouts, size=np.sum(states == state), p=probs[state])
+
+    prob_state = np.bincount(states) / len(states)
+    expected_ev = np.array([profits[states == s].mean() for s in range(2)])
+    variance = np.array([profits[states == s].var() for s in range(2)])
+    bets = [1.0, 10.0]
+    kwargs = dict(bankroll=200.0, hands_per_session=2000, num_paths=4000)
+
+    normal = simulate_bankroll(bets, expected_ev, prob_state, variance, seed=5, **kwargs)
+    bootstrap = simulate_bankroll(bets, expected_ev, prob_state, variance, outcomes=(states, profits),
+                                  seed=6, **kwargs)
+
+    assert bootstrap["expected_profit_per_hand"] == pytest.approx(normal["expected_profit_per_hand"], rel=1e-9)
+    assert bootstrap["n0"] == pytest.approx(normal["n0"], rel=1e-9)
+    assert bootstrap["risk_of_ruin"] == pytest.approx(normal["risk_of_ruin"], abs=0.04)
+    assert bootstrap["final_bankroll_mean"] == pytest.approx(normal["final_bankroll_mean"], rel=0.05)
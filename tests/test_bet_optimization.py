@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from blackjack_convex_optimisation import ScenarioSet, optimize_bets_cvar, optimize_bets_kelly
+
+def even_money_scenarios(expected_ev, prob_state, num_states):
+    """Win or lose one unit per count state, with the given EV; other states stay empty"""
+    states = np.arange(len(expected_ev))
+    scenarios = ScenarioSet(num_states)
+    scenarios.add(states, np.ones(len(states)), prob_state * (1 + expected_ev) / 2)
+    scenarios.add(states, -np.ones(len(states)), prob_state * (1 - expected_ev) / 2)
+    return scenarios
+
+def cvar(profits, weights, alpha):
+    """Expected loss in the worst (1 - alpha) tail, by Rockafellar-Uryasev over candidate thresholds"""
+    losses = -profits
+    return min(t + weights @ np.maximum(losses - t, 0) / (1 - alpha) for t in losses)
+
+def test_kelly_matches_the_closed_form_and_leaves_unobserved_states_at_the_minimum():
+    expected_ev = np.array([-0.02, 0.01, 0.03])
+    scenarios = even_money_scenarios(expected_ev, np.array([0.5, 0.3, 0.2]), num_states=5)
+    bankroll = 1000.0
+
+    bets, growth = optimize_bets_kelly(scenarios, bankroll, x_min=1.0, x_max=100.0)
+
+    assert bets.shape == (5,)
+    assert bets[0] == pytest.approx(1.0, abs=1e-3)
+    # Even-money Kelly bet: bankroll * ev / variance
+    variance = 1 - expected_ev[1:] ** 2
+    assert bets[1:3] == pytest.approx(bankroll * expected_ev[1:] / variance, rel=1e-2)
+    assert np.all(bets[3:] == 1.0)
+    assert growth > 0
+
+def test_cvar_limit_binds_and_unobserved_states_stay_at_the_minimum():
+    expected_ev = np.array([-0.05, 0.05])
+    scenarios = even_money_scenarios(expected_ev, np.array([0.5, 0.5]), num_states=4)
+
+    bets, profit = optimize_bets_cvar(scenarios, cvar_limit=10.0, alpha=0.95, x_min=1.0, x_max=100.0)
+
+    assert bets[0] == pytest.approx(1.0, abs=1e-3)
+    assert bets[1] == pytest.approx(10.0, rel=1e-3)
+    assert np.all(bets[2:] == 1.0)
+    scenario_profits = scenarios.profits * bets[scenarios.states]
+    assert cvar(scenario_profits, scenarios.weights, 0.95) == pytest.approx(10.0, rel=1e-3)
+    assert profit == pytest.approx(scenarios.weights @ scenario_profits, rel=1e-3)
+
+def test_cvar_bankroll_limit_counts_the_minimum_bets_of_unobserved_states():
+    scenarios = even_money_scenarios(np.array([0.05]), np.array([1.0]), num_states=3)
+
+    bets, _ = optimize_bets_cvar(scenarios, cvar_limit=100.0, x_min=1.0, x_max=100.0, total_bankroll=20.0)
+
+    assert bets[0] == pytest.approx(18.0, rel=1e-3)
+    assert np.all(bets[1:] == 1.0)
@@ -0,0 +1,61 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from blackjack_convex_optimisation import HAND_VARIANCE, optimize_bet_ramp
+
+def brute_force_ramp(expected_ev, prob_state, levels, max_levels, bankroll=None):
+    """Best objective over every monotone ramp with at most `max_levels` distinct bets"""
+    risk = 0.0 if bankroll is None else 1.0 / bankroll
+    best = -np.inf
+    for bets in itertools.combinations_with_replacement(levels, len(expected_ev)):
+        if len(set(bets)) > max_levels:
+            continue
+        bets = np.array(bets)
+        value = np.sum(prob_state * (expected_ev * bets - risk * HAND_VARIANCE * bets ** 2 / 2))
+        best = max(best, value)
+    return best
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("bankroll", [None, 200.0])
+def test_ramp_matches_brute_force(seed, bankroll):
+    rng = np.random.default_rng(seed)
+    num_states = 6
+    expected_ev = np.sort(rng.uniform(-0.03, 0.05, num_states))
+    prob_state = rng.dirichlet(np.ones(num_states))
+    max_levels = int(rng.integers(1, 4))
+
+    bets, value = optimize_bet_ramp(expected_ev, prob_state, x_min=2.0, x_max=10.0, chip=2.0,
+                                     max_levels=max_levels, bankroll=bankroll)
+
+    assert value == pytest.approx(brute_force_ramp(expected_ev, prob_state, [2.0, 4.0, 6.0, 8.0, 10.0],
+                                                   max_levels, bankroll))
+    # The returned bets achieve the reported value and form a valid ramp
+    risk = 0.0 if bankroll is None else 1.0 / bankroll
+    assert np.sum(prob_state * (expected_ev * bets - risk * HAND_VARIANCE * bets ** 2 / 2)) == pytest.approx(value)
+    assert np.all(np.diff(bets) >= 0)
+    assert len(np.unique(bets)) <= max_levels
+    assert np.all(bets % 2.0 == 0)
+
+def test_ramp_rejects_limits_without_chip_multiple():
+    with pytest.raises(ValueError):
+        optimize_bet_ramp(np.zeros(3), np.ones(3) / 3, x_min=1.0, x_max=4.0, chip=5.0)
+
+@pytest.mark.parametrize("chip, max_levels", [(0.0, 3), (-5.0, 3), (1.0, 0)])
+def test_ramp_rejects_invalid_chip_or_levels(chip, max_levels):
+    with pytest.raises(ValueError):
+        optimize_bet_ramp(np.zeros(3), np.ones(3) / 3, x_min=1.0, x_max=4.0, chip=chip, max_levels=max_levels)
+
+def test_long_ramp_backtracks_to_its_reported_value():
+    rng = np.random.default_rng(32)
+    num_states = 400
+    expected_ev = np.sort(rng.uniform(-0.03, 0.05, num_states))
+    prob_state = rng.dirichlet(np.ones(num_states))
+
+    bets, value = optimize_bet_ramp(expected_ev, prob_state, x_min=1.0, x_max=60.0, chip=1.0,
+                                     max_levels=6, bankroll=500.0)
+
+    assert np.sum(prob_state * (expected_ev * bets - HAND_VARIANCE * bets ** 2 / 1000.0)) == pytest.approx(value)
+    assert np.all(np.diff(bets) >= 0)
+    assert len(np.unique(bets)) <= 6
@@ -0,0 +1,104 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+from blackjack_common import load_simulator
+
+def one_deck_without(simulator, upcard):
+    return simulator.remove_card(simulator.shoe_counts(1), upcard)
+
+@pytest.mark.parametrize("upcard, peek_card", [(10, 11), (11, 10)])
+def test_dealer_probabilities_sum_to_one_and_exclude_blackjack_after_the_peek(upcard, peek_card):
+    simulator = load_simulator()
+    counts = one_deck_without(simulator, upcard)
+    hard_total, has_ace = (1, True) if upcard == 11 else (upcard, False)
+
+    peeked = simulator.dealer_probabilities(hard_total, has_ace, counts, peek_card)
+    unpeeked = simulator.dealer_probabilities(hard_total, has_ace, counts)
+    assert sum(peeked) == pytest.approx(1.0)
+    assert sum(unpeeked) == pytest.approx(1.0)
+
+    # Without the peek the dealer has blackjack with the hole-card probability;
+    # with it, every outcome is conditioned on the hole card not completing one
+    blackjack = counts[simulator.CARD_VALUES.index(peek_card)] / sum(counts)
+    expected_21 = (unpeeked[4] - blackjack) / (1 - blackjack)
+    assert peeked[4] == pytest.approx(expected_21)
+
+def test_peeked_ace_cannot_draw_a_ten_as_hole_card():
+    simulator = load_simulator()
+    # Tens and a single six: after the peek the hole card must be the six (soft 17)
+    counts = tuple(16 if value == 10 else 1 if value == 6 else 0 for value in simulator.CARD_VALUES)
+    assert simulator.dealer_probabilities(1, True, counts, 10) == pytest.approx((1, 0, 0, 0, 0, 0))
+
+@pytest.mark.parametrize("hand, upcard, action", [
+    # Hard 12 vs 4: only the hand holding a ten hits
+    ((2, 10), 4, 'H'), ((3, 9), 4, 'S'), ((4, 8), 4, 'S'), ((5, 7), 4, 'S'),
+    # Hard 8 vs 6: double, except 6-2
+    ((3, 5), 6, 'D'), ((2, 6), 6, 'H'),
+    # Hard 16 vs 10: hit two cards, stand with three
+    ((6, 10), 10, 'H'), ((7, 9), 10, 'H'), ((2, 4, 10), 10, 'S'), ((4, 4, 8), 10, 'S'),
+    # 11 vs ace doubles in a single deck
+    ((5, 6), 11, 'D'),
+    ((11, 11), 6, 'P'), ((10, 10), 6, 'S'), ((4, 4), 6, 'P'),
+])
+def test_known_single_deck_composition_decisions(hand, upcard, action):
+    simulator = load_simulator()
+    solver = simulator.CompositionSolver(upcard, one_deck_without(simulator, upcard))
+    evs = solver.action_evs(hand)
+    assert max(evs, key=evs.get) == action
+
+@pytest.fixture(scope="module")
+def table_vs_ten():
+    return load_simulator().strategy_table_for_upcard(10, num_decks=1)
+
+def test_table_covers_every_two_card_hand(table_vs_ten):
+    simulator = load_simulator()
+    values = simulator.CARD_VALUES
+    for i, first in enumerate(values):
+        for second in values[i:]:
+            actions = table_vs_ten[((first, second), 10)]
+            assert sorted(actions) == sorted('SHD' + ('P' if first == second else ''))
+
+def test_composition_strategy_skips_actions_that_are_not_allowed(table_vs_ten):
+    simulator = load_simulator()
+    strategy = simulator.CompositionStrategy(table_vs_ten)
+    card = simulator.value_card
+    ten = card(10)
+
+    assert table_vs_ten[((5, 6), 10)][0] == 'D'
+    assert strategy([card(5), card(6)], ten) == 'D'
+    assert strategy([card(5), card(6)], ten, can_double=False) == table_vs_ten[((5, 6), 10)].replace('D', '')[0]
+
+    assert table_vs_ten[((8, 8), 10)][0] == 'P'
+    assert strategy([card(8), card(8)], ten) == 'P'
+    fallback = strategy([card(8), card(8)], ten, can_double=False, can_split=False)
+    assert fallback == table_vs_ten[((8, 8), 10)].replace('P', '').replace('D', '')[0]
+
+    # Upcards missing from the table fall back to basic strategy
+    hand = [card(10), card(6)]
+    assert strategy(hand, card(6)) == simulator.basic_strategy(hand, card(6))
+
+@pytest.mark.parametrize("hand, upcard, action", [((5, 6), 11, 'H'), ((4, 4), 5, 'P'), ((4, 4), 6, 'P')])
+def test_six_deck_optimum_differs_from_the_chart(hand, upcard, action):
+    simulator = load_simulator()
+    counts = simulator.remove_card(simulator.shoe_counts(6), upcard)
+    evs = simulator.CompositionSolver(upcard, counts).action_evs(hand)
+    assert max(evs, key=evs.get) == action
+
+    cards = [simulator.value_card(value) for value in hand]
+    assert simulator.basic_strategy(cards, simulator.value_card(upcard)) != action
+
+def test_strategy_tables_generate_under_spawn(monkeypatch):
+    simulator = load_simulator()
+    # Spawned workers start without the simulator module the parent registered
+    monkeypatch.setattr(simulator, "ProcessPoolExecutor",
+                        partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")))
+    # One upcard keeps the solve short; the workers still solve it in their own module copy
+    monkeypatch.setattr(simulator, "CARD_VALUES", (10,))
+
+    table = simulator.generate_strategy_tables(num_decks=1, processes=1)
+
+    assert table[((8, 8), 10)][0] == 'P'
+    assert all(upcard == 10 for _, upcard in table)
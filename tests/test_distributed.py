@@ -0,0 +1,105 @@
+import multiprocessing
+
+import pytest
+
+import blackjack_distributed
+from blackjack_artifacts import arrays_to_accumulator
+from blackjack_common import SimulationAccumulator
+from blackjack_distributed import (Coordinator, load_campaign_result, parse_worker_message, run_local_campaign,
+                                   run_worker, simulate_range)
+
+NUM_HANDS = 12000
+RANGE_HANDS = 2000
+SEED = 12345
+
+def assert_same_result(a, b):
+    # Bit-for-bit: ranges are merged in the same order whatever the workers do
+    assert a.to_dict() == b.to_dict()
+
+@pytest.fixture(scope="module")
+def single_worker_result():
+    _, result = run_local_campaign(NUM_HANDS, num_workers=1, range_hands=RANGE_HANDS,
+                                   base_seed=SEED, return_accumulator=True)
+    return result
+
+def test_simulate_range_is_deterministic():
+    assert_same_result(simulate_range(500, seed=7), simulate_range(500, seed=7))
+
+def test_merge_combines_partial_results():
+    first, second = simulate_range(300, seed=1), simulate_range(300, seed=2)
+    merged = SimulationAccumulator().merge(first).merge(second)
+    assert merged.n == 600
+    assert merged.mean == pytest.approx((first.mean + second.mean) / 2)
+    assert_same_result(SimulationAccumulator.from_dict(merged.to_dict()), merged)
+
+def test_worker_count_does_not_change_result(single_worker_result):
+    _, result = run_local_campaign(NUM_HANDS, num_workers=3, range_hands=RANGE_HANDS,
+                                   base_seed=SEED, return_accumulator=True)
+    assert result.n == NUM_HANDS
+    assert_same_result(result, single_worker_result)
+
+def test_lost_worker_ranges_are_replayed(single_worker_result):
+    coordinator = Coordinator(NUM_HANDS, RANGE_HANDS, base_seed=SEED)
+    server = coordinator.serve("127.0.0.1", 0)
+    port = server.server_address[1]
+    try:
+        # This worker quits while holding its second range
+        flaky = multiprocessing.Process(target=run_worker, args=("127.0.0.1", port, 1))
+        flaky.start()
+        flaky.join()
+        worker = multiprocessing.Process(target=run_worker, args=("127.0.0.1", port))
+        worker.start()
+        assert coordinator.finished.wait(120)
+        worker.join()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert_same_result(coordinator.result, single_worker_result)
+
+def test_malformed_messages_are_rejected():
+    valid = {"type": "result", "range": 1, "accumulator": simulate_range(50, seed=3).to_dict()}
+    assert parse_worker_message(valid, num_ranges=2)[:2] == ("result", 1)
+    assert parse_worker_message({"type": "hello"}, num_ranges=2) == ("hello", None, None)
+
+    for message in ([], {}, {"type": "bogus"}, dict(valid, range=2), dict(valid, range="1"),
+                    {"type": "result", "range": 0}, dict(valid, accumulator={"n": 1}),
+                    dict(valid, accumulator=dict(valid["accumulator"], by_count={"x": [1, 0.0, 0.0]}))):
+        with pytest.raises(ValueError):
+            parse_worker_message(message, num_ranges=2)
+
+def test_release_leaves_reissued_ranges_with_their_new_holder():
+    coordinator = Coordinator(4000, 2000, base_seed=SEED, task_timeout=-1.0)
+    lost, live = object(), object()
+    first = coordinator.next_task(holder=lost)["range"]
+    second = coordinator.next_task(holder=lost)["range"]
+    # Both ranges are overdue, so the next request reissues the older one
+    reissued = coordinator.next_task(holder=live)["range"]
+    assert reissued == first
+
+    coordinator.release({first, second}, holder=lost)
+    assert list(coordinator.pending) == [second]
+    assert coordinator.holders[first] is live
+
+def test_ranges_finishing_out_of_order_merge_in_range_order():
+    partials = [simulate_range(300, seed=SEED + i) for i in range(4)]
+    in_order, out_of_order = Coordinator(1200, 300), Coordinator(1200, 300)
+    for i in range(4):
+        in_order.complete(i, partials[i])
+    for i in (2, 0, 3, 1):
+        out_of_order.complete(i, partials[i])
+
+    assert out_of_order.finished.is_set()
+    assert_same_result(out_of_order.result, in_order.result)
+
+def test_seeded_campaign_is_cached(tmp_path, monkeypatch, single_worker_result):
+    artifact = load_campaign_result(NUM_HANDS, num_workers=1, range_hands=RANGE_HANDS, base_seed=SEED,
+                                    cache_dir=tmp_path)
+    assert_same_result(arrays_to_accumulator(artifact), single_worker_result)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached campaign was run again")
+    monkeypatch.setattr(blackjack_distributed, "run_local_campaign", fail)
+    # Any worker count reads the same entry: it does not change the result
+    cached = load_campaign_result(NUM_HANDS, num_workers=3, range_hands=RANGE_HANDS, base_seed=SEED,
+                                  cache_dir=tmp_path)
+    assert_same_result(arrays_to_accumulator(cached), single_worker_result)
@@ -0,0 +1,55 @@
+import random
+
+import numpy as np
+import pytest
+
+from blackjack_common import load_simulator
+
+# Published infinite-deck dealer outcome probabilities (stands on soft 17),
+# given the dealer has no blackjack: 17, 18, 19, 20, 21, bust
+PUBLISHED_S17 = {
+    2: (0.139809, 0.134907, 0.129655, 0.124026, 0.117993, 0.353608),
+    3: (0.135034, 0.130482, 0.125581, 0.120329, 0.114700, 0.373875),
+    4: (0.130490, 0.125938, 0.121386, 0.116485, 0.111233, 0.394468),
+    5: (0.122251, 0.122251, 0.117700, 0.113148, 0.108246, 0.416404),
+    6: (0.165438, 0.106267, 0.106267, 0.101715, 0.097163, 0.423150),
+    7: (0.368566, 0.137797, 0.078625, 0.078625, 0.074074, 0.262312),
+    8: (0.128567, 0.359336, 0.128567, 0.069395, 0.069395, 0.244741),
+    9: (0.119995, 0.119995, 0.350765, 0.119995, 0.060824, 0.228425),
+    10: (0.120710, 0.120710, 0.120710, 0.370710, 0.037376, 0.229785),
+    11: (0.188917, 0.188917, 0.188917, 0.188917, 0.077806, 0.166525),
+}
+
+class InfiniteShoe:
+    """Deals every card independently with the infinite-deck rank probabilities"""
+    def __init__(self, simulator, rng):
+        self.rng = rng
+        self.cards = [simulator.value_card(value) for value in simulator.INFINITE_DECK_PROBS]
+        self.weights = list(simulator.INFINITE_DECK_PROBS.values())
+
+    def deal(self):
+        return self.rng.choices(self.cards, self.weights)[0]
+
+@pytest.mark.parametrize("upcard", range(2, 12))
+def test_dealer_distribution_sums_to_one(upcard):
+    simulator = load_simulator()
+    assert simulator.infinite_deck_dealer_distribution(upcard).sum() == pytest.approx(1.0)
+    # Also for a ten-rich deck, where the peek removes more of the hole cards
+    rich = {value: (5 if value == 10 else 1) / 14 for value in simulator.INFINITE_DECK_PROBS}
+    assert simulator.infinite_deck_dealer_distribution(upcard, rich).sum() == pytest.approx(1.0)
+
+@pytest.mark.parametrize("upcard", range(2, 12))
+def test_dealer_distribution_matches_published_probabilities(upcard):
+    simulator = load_simulator()
+    assert simulator.infinite_deck_dealer_distribution(upcard) == pytest.approx(PUBLISHED_S17[upcard], abs=2e-6)
+
+def test_house_edge_agrees_with_simulation_on_an_infinite_shoe():
+    simulator = load_simulator()
+    shoe = InfiniteShoe(simulator, random.Random(27))
+    profits = np.empty(200000)
+    for i in range(len(profits)):
+        player_hand = [shoe.deal(), shoe.deal()]
+        profits[i] = simulator.play_dealt_hand(shoe, player_hand, [shoe.deal(), shoe.deal()])
+    std_error = profits.std(ddof=1) / np.sqrt(len(profits))
+
+    assert abs(simulator.infinite_deck_house_edge() - -profits.mean()) < 3 * std_error
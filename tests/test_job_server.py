@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+from blackjack_job_server import JobServer
+
+async def request(port, message):
+    """Send one request line and return the final event"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write((json.dumps(message) + "\n").encode())
+    await writer.drain()
+    while True:
+        event = json.loads(await reader.readline())
+        if event["event"] in ("result", "error"):
+            break
+    writer.close()
+    await writer.wait_closed()
+    return event
+
+async def exercise_simulation_cache():
+    server = JobServer(workers=1, chunk_hands=1000)
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        unseeded = {"type": "simulate", "params": {"num_hands": 2000}}
+        first = await request(port, unseeded)
+        second = await request(port, unseeded)
+        seeded = {"type": "simulate", "params": {"num_hands": 2000, "seed": first["result"]["seed"]}}
+        repeat = await request(port, seeded)
+        invalid = await request(port, [1, 2])
+    finally:
+        await server.close()
+    return first, second, repeat, invalid
+
+def test_unseeded_simulations_are_not_served_from_cache():
+    first, second, repeat, invalid = asyncio.run(exercise_simulation_cache())
+
+    assert not first["cached"] and not second["cached"]
+    assert first["result"]["seed"] != second["result"]["seed"]
+    # Passing the returned seed reproduces the run from the cache
+    assert repeat["cached"]
+    assert repeat["result"] == first["result"]
+    assert invalid["event"] == "error"
+
+async def exercise_concurrent_simulations():
+    server = JobServer(workers=2, chunk_hands=500)
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        jobs = [{"type": "simulate", "params": {"num_hands": 3000, "seed": seed}} for seed in (1, 2, 3)]
+        concurrent = await asyncio.wait_for(asyncio.gather(*[request(port, job) for job in jobs]), 60)
+        # Every worker slot was handed back, so a later simulation still runs
+        later = await asyncio.wait_for(request(port, {"type": "simulate",
+                                                      "params": {"num_hands": 3000, "seed": 4}}), 60)
+        slots_free = server.slots.free == server.workers
+    finally:
+        await server.close()
+    return concurrent, later, slots_free
+
+def test_concurrent_simulations_share_the_worker_slots():
+    concurrent, later, slots_free = asyncio.run(exercise_concurrent_simulations())
+
+    assert all(event["event"] == "result" and event["result"]["hands"] == 3000 for event in concurrent)
+    assert later["event"] == "result"
+    assert slots_free
+
+async def exercise_priority_under_load():
+    server = JobServer(workers=2, chunk_hands=2000)
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        simulations = [asyncio.create_task(request(port, {"type": "simulate",
+                                                           "params": {"num_hands": 400000, "seed": seed}}))
+                       for seed in (1, 2)]
+        await asyncio.sleep(0.5)  # Both simulations are holding every worker
+        started = loop_time()
+        small = await asyncio.wait_for(request(port, {"type": "infinite_deck", "priority": -100}), 30)
+        elapsed = loop_time() - started
+        simulations_running = not any(simulation.done() for simulation in simulations)
+        for simulation in simulations:
+            simulation.cancel()
+    finally:
+        await server.close()
+    return small, elapsed, simulations_running
+
+def loop_time():
+    return asyncio.get_running_loop().time()
+
+def test_high_priority_job_runs_while_simulations_hold_every_worker():
+    small, elapsed, simulations_running = asyncio.run(exercise_priority_under_load())
+
+    assert small["event"] == "result"
+    assert simulations_running
+    assert elapsed < 2.0
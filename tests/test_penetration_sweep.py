@@ -0,0 +1,42 @@
+import math
+import random
+
+import pytest
+
+from blackjack_common import load_simulator
+
+def test_sweep_runs_and_deeper_cut_cards_deal_more_hands():
+    simulator = load_simulator()
+    random.seed(2024)
+    penetrations = (0.5, 0.6, 0.75, 0.85)
+    results = simulator.penetration_sweep(num_shoes=200, penetrations=penetrations)
+
+    assert sorted(results) == sorted(penetrations)
+    hands_per_shoe = [results[p]["hands_per_shoe"] for p in penetrations]
+    assert all(a < b for a, b in zip(hands_per_shoe, hands_per_shoe[1:]))
+    # Roughly 5.4 cards per hand in a six-deck shoe
+    assert 20 < hands_per_shoe[0] < 40
+    assert all(math.isfinite(results[p]["house_edge"]) and abs(results[p]["house_edge"]) < 0.2
+               for p in penetrations)
+
+def test_sweep_deals_the_same_hands_as_separate_runs():
+    simulator = load_simulator()
+    num_shoes = 20
+    penetrations = (0.6, 0.75, 0.85)
+    random.seed(11)
+    results = simulator.penetration_sweep(num_shoes=num_shoes, penetrations=penetrations)
+
+    for p in penetrations:
+        # A separate run from the same shuffles, reshuffling at the Deck cut card
+        random.seed(11)
+        deck = simulator.Deck(6, p)
+        hands, profit = 0, 0.0
+        for shoe in range(num_shoes):
+            if shoe:
+                deck.reset()
+            while not deck.needs_shuffle():
+                profit += simulator.play_hand(deck)
+                hands += 1
+
+        assert results[p]["hands_per_shoe"] == hands / num_shoes
+        assert results[p]["house_edge"] == pytest.approx(-profit / hands)
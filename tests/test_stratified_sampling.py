@@ -0,0 +1,32 @@
+import random
+
+import numpy as np
+import pytest
+
+from blackjack_common import load_simulator
+
+def plain_off_the_top(simulator, num_hands, num_decks=6):
+    """Plain sampling of hands dealt from the top of a full fresh shoe"""
+    shoe = simulator.StratumShoe(simulator.Deck(num_decks).cards)
+    profits = np.empty(num_hands)
+    for i in range(num_hands):
+        shoe.reset()
+        player_hand = [shoe.deal(), shoe.deal()]
+        profits[i] = simulator.play_dealt_hand(shoe, player_hand, [shoe.deal(), shoe.deal()])
+    return -profits.mean(), profits.std(ddof=1) / np.sqrt(num_hands)
+
+def test_stratified_estimate_agrees_with_plain_sampling():
+    simulator = load_simulator()
+    random.seed(7)
+    house_edge, std_error = simulator.stratified_monte_carlo_blackjack(40000)
+    random.seed(8)
+    plain_edge, plain_error = plain_off_the_top(simulator, 40000)
+
+    assert abs(house_edge - plain_edge) < 4 * np.hypot(std_error, plain_error)
+    # The reported error must not collapse below what the sample can support
+    assert std_error > 0.5 * plain_error
+
+def test_stratified_sampling_refuses_budgets_below_the_pilot():
+    simulator = load_simulator()
+    with pytest.raises(ValueError, match="pilot hands"):
+        simulator.stratified_monte_carlo_blackjack(1000)
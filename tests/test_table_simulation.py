@@ -0,0 +1,79 @@
+import multiprocessing
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from blackjack_common import load_simulator
+
+def test_single_seat_table_agrees_with_monte_carlo_blackjack():
+    simulator = load_simulator()
+    num_hands = 100000
+    random.seed(29)
+    house_edge = simulator.monte_carlo_blackjack(num_hands, penetration=0.75)
+    random.seed(29)
+    result, = simulator.monte_carlo_table(num_hands, [simulator.Seat()], penetration=0.75)
+
+    # Same shoe, penetration and between-hand reshuffle; only the deal order differs
+    std_error = 1.15 / np.sqrt(num_hands)
+    assert abs(result["house_edge"] - house_edge) < 4 * np.sqrt(2) * std_error
+    assert result["average_bet"] == 1.0
+    # 234 cards before the cut card at about 5.4 cards per hand
+    assert 40 < result["rounds_per_shoe"] < 46
+
+def test_seeded_table_is_reproducible():
+    simulator = load_simulator()
+    seats = [simulator.Seat(), simulator.Seat(bet_ramp=[(1, 4)])]
+    first = simulator.simulate_table(2000, seats, seed=5)
+    second = simulator.simulate_table(2000, seats, seed=5)
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+
+def test_bets_are_sized_from_the_count_after_the_cut_card_shuffle():
+    simulator = load_simulator()
+    seat = simulator.Seat(bet_ramp=[(1, 4), (3, 8)])
+    deck = simulator.Deck(6, rng=random.Random(3))
+
+    # A hot count with the cut card still ahead: the ramp applies
+    deck.running_count = 20
+    (bet, _), = simulator.play_round(deck, [seat])
+    assert bet == 8
+
+    # The same count past the cut card: the shoe is reshuffled before betting
+    deck.cards = deck.cards[:40]
+    deck.running_count = 20
+    (bet, _), = simulator.play_round(deck, [seat])
+    assert bet == 1
+
+@pytest.mark.parametrize("num_seats", [1, 7])
+def test_tables_seat_one_to_seven_players(num_seats):
+    simulator = load_simulator()
+    results = simulator.monte_carlo_table(200, [simulator.Seat() for _ in range(num_seats)])
+    assert len(results) == num_seats
+
+@pytest.mark.parametrize("num_seats", [0, 8])
+def test_tables_reject_other_seat_counts(num_seats):
+    simulator = load_simulator()
+    with pytest.raises(ValueError, match="between 1 and 7 seats"):
+        simulator.monte_carlo_table(200, [simulator.Seat() for _ in range(num_seats)])
+
+def run_with_timeout(function, timeout):
+    """Call `function` in a daemon thread so a hung worker pool fails the test instead of blocking it"""
+    results = []
+    thread = threading.Thread(target=lambda: results.append(function()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert results, f"no result within {timeout} seconds"
+    return results[0]
+
+def test_parallel_tables_run_under_spawn(monkeypatch):
+    simulator = load_simulator()
+    # Spawned workers start without the simulator module the parent registered
+    monkeypatch.setattr(simulator.multiprocessing, "Pool", multiprocessing.get_context("spawn").Pool)
+    seats = [simulator.Seat(), simulator.Seat(bet_ramp=[(1, 4)])]
+
+    results = run_with_timeout(lambda: simulator.monte_carlo_table(50, seats, num_tables=2, processes=2), 60)
+
+    assert len(results) == 2
+    assert all(result["average_bet"] >= 1.0 for result in results)